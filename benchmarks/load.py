@@ -0,0 +1,245 @@
+"""HTTP load benchmark for the fast_zero routes.
+
+Runs a weighted mix of login, list, create, patch and delete requests
+against a running server, using the accounts created by
+``benchmarks.seed``, and reports throughput and latency percentiles per
+operation. Results can be saved as a baseline and later runs compared
+against it; a regression beyond ``--tolerance`` exits with status 1.
+
+    python -m benchmarks.load --save benchmarks/baselines/local.json
+    python -m benchmarks.load --compare benchmarks/baselines/local.json
+
+All workers share one client IP, so the login limits would throttle the
+run; start the server with them disabled:
+
+    RATE_LIMIT_LOGIN_IP= RATE_LIMIT_LOGIN_USERNAME= task serve
+
+Rate-limited (429) responses are left out of the latency figures and
+reported separately.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+from collections import defaultdict
+from http import HTTPStatus
+from pathlib import Path
+from time import perf_counter
+
+import httpx
+
+from benchmarks.seed import USERNAME_PREFIX
+
+WORKLOAD = {'login': 5, 'list': 50, 'create': 20, 'patch': 15, 'delete': 10}
+HISTOGRAM_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+async def login(client, state):
+    response = await client.post(
+        '/auth/token',
+        data={'username': state['email'], 'password': state['password']},
+    )
+    if response.is_success:
+        state['headers'] = {
+            'Authorization': f'Bearer {response.json()["access_token"]}'
+        }
+
+    return response
+
+
+async def list_todos(client, state):
+    return await client.get(
+        '/todos/', params={'limit': 50}, headers=state['headers']
+    )
+
+
+async def create_todo(client, state):
+    response = await client.post(
+        '/todos/',
+        headers=state['headers'],
+        json={'title': 'load', 'description': 'benchmark', 'state': 'todo'},
+    )
+    if response.is_success:
+        state['todo_ids'].append(response.json()['id'])
+
+    return response
+
+
+async def patch_todo(client, state):
+    return await client.patch(
+        f'/todos/{state["rng"].choice(state["todo_ids"])}',
+        headers=state['headers'],
+        json={'state': 'doing'},
+    )
+
+
+async def delete_todo(client, state):
+    return await client.delete(
+        f'/todos/{state["todo_ids"].pop()}', headers=state['headers']
+    )
+
+
+OPERATIONS = {
+    'login': login,
+    'list': list_todos,
+    'create': create_todo,
+    'patch': patch_todo,
+    'delete': delete_todo,
+}
+
+
+async def worker(client, user: int, args, deadline: float, results):
+    state = {
+        'email': f'{USERNAME_PREFIX}{user}@email.com',
+        'password': args.password,
+        'headers': {},
+        'todo_ids': [],
+        'rng': random.Random(user),
+    }
+    await login(client, state)
+
+    names, weights = zip(*WORKLOAD.items(), strict=True)
+    while perf_counter() < deadline:
+        name = state['rng'].choices(names, weights)[0]
+        if name in {'patch', 'delete'} and not state['todo_ids']:
+            name = 'create'
+
+        start = perf_counter()
+        response = await OPERATIONS[name](client, state)
+        results[name].append((
+            (perf_counter() - start) * 1000,
+            response.status_code,
+        ))
+
+
+def _throttled(status: int) -> bool:
+    return status == HTTPStatus.TOO_MANY_REQUESTS
+
+
+def summarize(samples, duration: float) -> dict:
+    served = [sample for sample in samples if not _throttled(sample[1])]
+    latencies = [latency for latency, _ in served]
+    percentiles = statistics.quantiles(latencies, n=100, method='inclusive')
+
+    return {
+        'requests': len(served),
+        'errors': sum(
+            status >= HTTPStatus.BAD_REQUEST for _, status in served
+        ),
+        'throttled': len(samples) - len(served),
+        'rps': len(served) / duration,
+        'p50': percentiles[49],
+        'p95': percentiles[94],
+        'p99': percentiles[98],
+        'max': max(latencies),
+    }
+
+
+def print_report(report: dict, samples):
+    print(
+        f'{"operation":<10} {"requests":>9} {"errors":>7} {"429s":>6} '
+        f'{"req/s":>9} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} '
+        f'{"max ms":>8}'
+    )
+    for name, stats in report.items():
+        print(
+            f'{name:<10} {stats["requests"]:>9} {stats["errors"]:>7} '
+            f'{stats["throttled"]:>6} {stats["rps"]:>9.1f} '
+            f'{stats["p50"]:>8.2f} {stats["p95"]:>8.2f} '
+            f'{stats["p99"]:>8.2f} {stats["max"]:>8.2f}'
+        )
+
+    print('\nlatency histogram (all operations)')
+    samples = [sample for sample in samples if not _throttled(sample[1])]
+    lower = 0
+    for upper in (*HISTOGRAM_BUCKETS_MS, float('inf')):
+        count = sum(lower <= latency < upper for latency, _ in samples)
+        bar = '#' * round(count / len(samples) * 50)
+        print(f'{lower:>7g}-{upper:<7g} ms {count:>8} {bar}')
+        lower = upper
+
+
+def find_regressions(report: dict, baseline: dict, tolerance: float):
+    for name, stats in report.items():
+        if name not in baseline:
+            continue
+
+        expected = baseline[name]
+        for key in ('p50', 'p95', 'p99'):
+            if stats[key] > expected[key] * (1 + tolerance):
+                yield (
+                    f'{name} {key}: {stats[key]:.2f} ms '
+                    f'(baseline {expected[key]:.2f} ms)'
+                )
+
+        if stats['rps'] < expected['rps'] * (1 - tolerance):
+            yield (
+                f'{name} req/s: {stats["rps"]:.1f} '
+                f'(baseline {expected["rps"]:.1f})'
+            )
+
+
+async def main(args) -> int:
+    results = defaultdict(list)
+    async with httpx.AsyncClient(
+        base_url=args.base_url,
+        timeout=args.timeout,
+        limits=httpx.Limits(max_connections=args.concurrency),
+    ) as client:
+        start = perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(
+            *(
+                worker(client, user % args.users, args, deadline, results)
+                for user in range(args.concurrency)
+            )
+        )
+        duration = perf_counter() - start
+
+    samples = [sample for values in results.values() for sample in values]
+    # quantiles() needs at least two samples; short runs may miss some ops.
+    report = {
+        name: summarize(results[name], duration)
+        for name in WORKLOAD
+        if sum(not _throttled(status) for _, status in results[name]) > 1
+    }
+    report['all'] = summarize(samples, duration)
+    print_report(report, samples)
+
+    if report['all']['throttled']:
+        print(
+            f'\nWARNING {report["all"]["throttled"]} requests were rate '
+            'limited and excluded; disable the limits for benchmark runs.'
+        )
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(report, indent=2) + '\n')
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        regressions = list(find_regressions(report, baseline, args.tolerance))
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+
+        return int(bool(regressions))
+
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--password', default='load-passwd')
+    parser.add_argument('--timeout', type=float, default=10)
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    parser.add_argument('--save', type=Path)
+    parser.add_argument('--compare', type=Path)
+
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,124 @@
+"""Todo search benchmark.
+
+Seeds a scratch database with generated todos and compares the latency of
+the LIKE filters and the full-text ``q`` search used by ``GET /todos/``,
+with and without the search indexes being usable by the planner.
+
+    python -m benchmarks.search --rows 2000000 --users 20
+"""
+
+import argparse
+import asyncio
+import statistics
+from time import perf_counter
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from fast_zero.models import TODO_SEARCH_CONFIG, Todo, table_registry
+from fast_zero.settings import Settings
+
+WORDS = (
+    'milk bread report deploy review invoice meeting garden travel book '
+    'doctor groceries refactor release backup budget laundry dinner call '
+    'email tickets taxes insurance gym piano homework cleanup painting'
+).split()
+
+SEED_USERS = """
+INSERT INTO users (username, email, password)
+SELECT 'bench' || n, 'bench' || n || '@bench.com', 'not-a-hash'
+FROM generate_series(1, :users) AS n
+ON CONFLICT DO NOTHING
+"""
+
+SEED_TODOS = """
+WITH vocabulary AS (SELECT CAST(:words AS text[]) AS words)
+INSERT INTO todos (title, description, state, user_id)
+SELECT
+    words[1 + floor(random() * cardinality(words))::int] || ' '
+        || substr(md5(random()::text), 1, 8),
+    words[1 + floor(random() * cardinality(words))::int] || ' '
+        || words[1 + floor(random() * cardinality(words))::int] || ' '
+        || substr(md5(random()::text), 1, 16),
+    'todo',
+    (SELECT min(id) FROM users) + n % :users
+FROM vocabulary, generate_series(1, :rows) AS n
+"""
+
+
+def search_queries(user_id: int, term: str):
+    todos = select(Todo).where(Todo.user_id == user_id)
+    ts_query = func.websearch_to_tsquery(TODO_SEARCH_CONFIG, term)
+
+    return {
+        'title LIKE': todos.where(Todo.title.contains(term)),
+        'description LIKE': todos.where(Todo.description.contains(term)),
+        'q full-text': todos.where(
+            Todo.search_vector.bool_op('@@')(ts_query)
+        ).order_by(func.ts_rank(Todo.search_vector, ts_query).desc()),
+    }
+
+
+async def seed(engine, rows: int, users: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+        count = await conn.scalar(text('SELECT count(*) FROM todos'))
+        if count >= rows:
+            return
+
+        await conn.execute(text(SEED_USERS), {'users': users})
+        await conn.execute(
+            text(SEED_TODOS),
+            {'rows': rows - count, 'users': users, 'words': WORDS},
+        )
+
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level='AUTOCOMMIT')
+        await conn.execute(text('VACUUM ANALYZE todos'))
+
+
+async def measure(engine, query, repeat: int, use_indexes: bool):
+    timings = []
+    async with engine.connect() as conn:
+        if not use_indexes:
+            await conn.execute(text('SET enable_indexscan = off'))
+            await conn.execute(text('SET enable_bitmapscan = off'))
+
+        for _ in range(repeat):
+            start = perf_counter()
+            (await conn.execute(query)).all()
+            timings.append((perf_counter() - start) * 1000)
+
+    return statistics.median(timings), max(timings)
+
+
+async def main(args):
+    engine = create_async_engine(args.database_url)
+    await seed(engine, args.rows, args.users)
+
+    async with engine.connect() as conn:
+        user_id = await conn.scalar(select(func.min(Todo.user_id)))
+
+    print(f'{"query":<18} {"mode":<10} {"median ms":>10} {"max ms":>10}')
+    for name, query in search_queries(user_id, args.term).items():
+        for use_indexes in (False, True):
+            median, worst = await measure(
+                engine, query, args.repeat, use_indexes
+            )
+            mode = 'indexed' if use_indexes else 'seq scan'
+            print(f'{name:<18} {mode:<10} {median:>10.2f} {worst:>10.2f}')
+
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', default=None)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--term', default='milk')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+    args.database_url = args.database_url or Settings().DATABASE_URL
+
+    asyncio.run(main(args))
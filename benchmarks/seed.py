@@ -0,0 +1,74 @@
+"""Seed a database for the load benchmark.
+
+Creates ``--users`` accounts named ``load<n>`` (all sharing ``--password``)
+with ``--todos`` todos each, using the test suite factories.
+
+    python -m benchmarks.seed --users 50 --todos 200
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from fast_zero import security
+from fast_zero.models import Todo, User, table_registry
+from fast_zero.settings import Settings
+from tests.factories import TodoFactory, UserFactory
+
+USERNAME_PREFIX = 'load'
+
+
+async def seed(database_url: str, users: int, todos: int, password: str):
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+
+    # Hashing once keeps seeding fast; Argon2 is deliberately slow.
+    hashed_password = security.get_password_hash(password)
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        previous_users = select(User.id).where(
+            User.username.startswith(USERNAME_PREFIX)
+        )
+        await session.execute(
+            delete(Todo).where(Todo.user_id.in_(previous_users))
+        )
+        await session.execute(delete(User).where(User.id.in_(previous_users)))
+
+        db_users = [
+            UserFactory(
+                username=f'{USERNAME_PREFIX}{n}', password=hashed_password
+            )
+            for n in range(users)
+        ]
+        session.add_all(db_users)
+        await session.flush()
+
+        for db_user in db_users:
+            session.add_all(
+                TodoFactory.create_batch(todos, user_id=db_user.id)
+            )
+
+        await session.commit()
+
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', default=None)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--todos', type=int, default=200)
+    parser.add_argument('--password', default='load-passwd')
+    args = parser.parse_args()
+
+    asyncio.run(
+        seed(
+            args.database_url or Settings().DATABASE_URL,
+            args.users,
+            args.todos,
+            args.password,
+        )
+    )
@@ -0,0 +1,82 @@
+"""Response serialisation benchmark.
+
+Compares FastAPI's default response path (validate against
+``response_model``, convert to JSON-compatible Python, ``json.dumps``)
+with ``ModelResponse`` (one validation dumped straight to JSON bytes) for a
+``TodoList`` of ORM objects. No database is needed.
+
+    python -m benchmarks.serialization --items 10000
+"""
+
+import argparse
+import asyncio
+import statistics
+from datetime import datetime
+from time import perf_counter
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from fast_zero.models import Todo, TodoState
+from fast_zero.responses import ModelResponse
+from fast_zero.schemas import TodoList
+
+
+def make_todos(items: int) -> list[Todo]:
+    now = datetime.now()
+    todos = []
+    for n in range(items):
+        todo = Todo(
+            title=f'title {n}',
+            description=f'description {n}',
+            state=TodoState.todo,
+            user_id=1,
+        )
+        todo.id, todo.created_at, todo.updated_at = n, now, now
+        todos.append(todo)
+
+    return todos
+
+
+async def default_path(todos: list[Todo]) -> bytes:
+    field = create_response_field(name='response', type_=TodoList)
+    content = await serialize_response(
+        field=field, response_content={'todos': todos, 'next_cursor': None}
+    )
+    return JSONResponse(content).body
+
+
+async def fast_path(todos: list[Todo]) -> bytes:
+    return ModelResponse(TodoList, {'todos': todos, 'next_cursor': None}).body
+
+
+async def measure(render, todos: list[Todo], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        await render(todos)
+        timings.append((perf_counter() - start) * 1000)
+
+    return statistics.median(timings)
+
+
+async def main(args):
+    todos = make_todos(args.items)
+    assert await default_path(todos) == await fast_path(todos)
+
+    default = await measure(default_path, todos, args.repeat)
+    fast = await measure(fast_path, todos, args.repeat)
+
+    print(f'{"path":<16} {"median ms":>10}')
+    print(f'{"response_model":<16} {default:>10.2f}')
+    print(f'{"ModelResponse":<16} {fast:>10.2f}')
+    print(f'speedup: {default / fast:.1f}x')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=20)
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,80 @@
+"""Startup benchmark.
+
+Measures in fresh interpreters how long importing ``fast_zero.app`` takes
+and how long a uvicorn process takes from spawn until it answers its first
+request, both for ``GET /`` and for the database-backed ``GET /users/``.
+
+    python -m benchmarks.startup --repeat 10
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from time import perf_counter, sleep
+
+import httpx
+
+IMPORT_APP = (
+    'from time import perf_counter; start = perf_counter(); '
+    'import fast_zero.app; print(perf_counter() - start)'
+)
+
+
+def measure_import() -> float:
+    result = subprocess.run(
+        [sys.executable, '-c', IMPORT_APP],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return float(result.stdout) * 1000
+
+
+def measure_first_request(port: int, path: str) -> float:
+    start = perf_counter()
+    server = subprocess.Popen([
+        sys.executable,
+        '-m',
+        'uvicorn',
+        'fast_zero.app:app',
+        '--port',
+        str(port),
+        '--log-level',
+        'warning',
+    ])
+    try:
+        while True:
+            try:
+                httpx.get(f'http://127.0.0.1:{port}{path}').raise_for_status()
+                return (perf_counter() - start) * 1000
+            except httpx.TransportError:
+                sleep(0.005)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(args):
+    results = {
+        'import fast_zero.app': [measure_import() for _ in range(args.repeat)],
+    }
+    for path in ('/', '/users/?limit=1'):
+        results[f'first GET {path}'] = [
+            measure_first_request(args.port, path) for _ in range(args.repeat)
+        ]
+
+    print(f'{"measurement":<28} {"median ms":>10} {"max ms":>10}')
+    for name, timings in results.items():
+        print(
+            f'{name:<28} {statistics.median(timings):>10.1f} '
+            f'{max(timings):>10.1f}'
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--port', type=int, default=8799)
+
+    main(parser.parse_args())
@@ -1,4 +1,4 @@
 #!/bin/sh
-poetry run alembic upgrade head
+alembic upgrade head
 
-poetry run uvicorn --host 0.0.0.0 --port 8000 fast_zero.app:app
+exec python -m fast_zero.server
@@ -1,12 +1,47 @@
+from contextlib import asynccontextmanager
 from http import HTTPStatus
+from time import perf_counter
 
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, PlainTextResponse
 
+from fast_zero import metrics, notifications
+from fast_zero.compression import (
+    CompressionMiddleware,
+    precompress,
+    precompressed_response,
+)
+from fast_zero.database import Database, RequestStats, request_stats
 from fast_zero.routes import auth, todos, users
 from fast_zero.schemas import Message
+from fast_zero.settings import get_settings
 
-app = FastAPI()
+settings = get_settings()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.database = Database(settings)
+    yield
+    await notifications.hub.close()
+    await app.state.database.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
+
+request_duration = metrics.Histogram(
+    'http_request_duration_seconds',
+    'Time until the response starts, per route.',
+)
+request_db_duration = metrics.Histogram(
+    'http_request_db_seconds',
+    'Time spent running database queries, per route.',
+)
+request_queries = metrics.Histogram(
+    'http_request_db_queries',
+    'Database queries issued per request, per route.',
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100),
+)
 
 
 database = []
@@ -21,11 +56,43 @@ html_content = """
     </body>
 </html>
 """
+html_variants = precompress(
+    html_content.encode(), settings.COMPRESSION_ENCODINGS
+)
+
+
+@app.middleware('http')
+async def instrument_requests(request: Request, call_next):
+    stats = RequestStats()
+    token = request_stats.set(stats)
+    start = perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        request_stats.reset(token)
+
+    total = perf_counter() - start
+    # Label by route template, not path, to keep the series bounded.
+    route = getattr(request.scope.get('route'), 'path', 'unmatched')
+    labels = {'method': request.method, 'route': route}
+    request_duration.observe(total, **labels)
+    request_db_duration.observe(stats.db_time, **labels)
+    request_queries.observe(stats.queries, **labels)
+
+    handler_time = total - stats.db_time - stats.pool_wait
+    response.headers['Server-Timing'] = ', '.join((
+        f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries"',
+        f'pool;dur={stats.pool_wait * 1000:.2f}',
+        f'app;dur={handler_time * 1000:.2f}',
+        f'total;dur={total * 1000:.2f}',
+    ))
+
+    return response
 
 
 @app.get('/hello_text', response_class=HTMLResponse)
-def hello_text():
-    return HTMLResponse(html_content)
+def hello_text(request: Request):
+    return precompressed_response(request, html_variants, 'text/html')
 
 
 @app.get('/', status_code=HTTPStatus.OK, response_model=Message)
@@ -33,6 +100,20 @@ def hello():
     return {'message': 'Olá Mundo!'}
 
 
+@app.get('/metrics', response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    return PlainTextResponse(
+        metrics.render(), media_type='text/plain; version=0.0.4'
+    )
+
+
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    media_types=settings.COMPRESSION_MEDIA_TYPES,
+    encodings=settings.COMPRESSION_ENCODINGS,
+)
+
 # Routers
 app.include_router(users.router)
 app.include_router(auth.router)
@@ -0,0 +1,171 @@
+import asyncio
+import json
+from collections import OrderedDict
+from time import monotonic
+
+from fast_zero import metrics
+from fast_zero.settings import Settings, get_settings, get_worker_count
+
+try:
+    from redis import asyncio as redis
+except ImportError:  # pragma: no cover
+    redis = None
+
+
+class LRUCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is None:
+            return default
+
+        value, expires_at = item
+        if expires_at <= monotonic():
+            self._data.pop(key, None)
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl: float | None = None):
+        expires_at = monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+
+class MemoryBackend:
+    def __init__(self, namespace: str, maxsize: int, ttl: float):
+        self.namespace = namespace
+        self.local = LRUCache(maxsize, ttl)
+
+    async def get(self, key):
+        return self.local.get(key)
+
+    async def set(self, key, value, ttl: float | None = None):
+        self.local.set(key, value, ttl)
+
+    async def delete(self, key):
+        self.local.delete(key)
+
+    async def clear(self):
+        self.local.clear()
+
+
+class RedisBackend:
+    def __init__(self, namespace: str, url: str, ttl: float):
+        if redis is None:  # pragma: no cover
+            raise RuntimeError('The redis cache backend requires `redis`')
+
+        self.namespace = namespace
+        self.ttl = ttl
+        self.client = redis.from_url(url)
+
+    def _key(self, key) -> str:
+        return f'fast_zero:{self.namespace}:{key}'
+
+    async def get(self, key):
+        value = await self.client.get(self._key(key))
+        return None if value is None else json.loads(value)
+
+    async def set(self, key, value, ttl: float | None = None):
+        await self.client.set(
+            self._key(key),
+            json.dumps(value),
+            px=int((self.ttl if ttl is None else ttl) * 1000),
+        )
+
+    async def delete(self, key):
+        await self.client.delete(self._key(key))
+
+    async def clear(self):
+        async for key in self.client.scan_iter(self._key('*')):
+            await self.client.delete(key)
+
+
+# A process-local cache never sees invalidations made by other workers, so
+# with several workers it only absorbs bursts; Redis keeps the full TTL.
+def get_cache_ttl(settings: Settings, ttl: float, local_ttl: float) -> float:
+    if settings.CACHE_BACKEND == 'redis' or get_worker_count(settings) == 1:
+        return ttl
+
+    return min(ttl, local_ttl)
+
+
+# Values must be JSON serialisable so both backends are interchangeable.
+def get_cache(namespace: str, maxsize: int, ttl: float):
+    settings = get_settings()
+
+    if settings.CACHE_BACKEND == 'redis':
+        return RedisBackend(namespace, settings.CACHE_REDIS_URL, ttl)
+
+    return MemoryBackend(namespace, maxsize, ttl)
+
+
+cache_requests = metrics.Counter(
+    'cache_requests_total',
+    'Loading cache lookups, labelled by namespace and hit, miss or coalesced.',
+)
+
+_FAILED = object()
+
+
+class LoadingCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.generation = 0
+        self._loading = {}
+
+    async def get_or_load(self, key: str, load):
+        value = await self.backend.get(key)
+        if value is not None:
+            cache_requests.inc(namespace=self.backend.namespace, result='hit')
+            return value
+
+        # Concurrent misses wait for the request already loading the key
+        # instead of each querying; if that load fails, one of them retries.
+        while (loading := self._loading.get(key)) is not None:
+            cache_requests.inc(
+                namespace=self.backend.namespace, result='coalesced'
+            )
+            value = await asyncio.shield(loading)
+            if value is not _FAILED:
+                return value
+
+        cache_requests.inc(namespace=self.backend.namespace, result='miss')
+        loading = asyncio.get_running_loop().create_future()
+        self._loading[key] = loading
+        generation = self.generation
+        value = _FAILED
+        try:
+            value = await load()
+            # An invalidation during the load may have made it stale.
+            if value is not None and self.generation == generation:
+                await self.backend.set(key, value)
+            return value
+        finally:
+            del self._loading[key]
+            loading.set_result(value)
+
+    async def delete(self, key: str):
+        self.generation += 1
+        await self.backend.delete(key)
+
+    async def clear(self):
+        self.generation += 1
+        await self.backend.clear()
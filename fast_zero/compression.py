@@ -0,0 +1,177 @@
+import zlib
+
+from fastapi import Request, Response
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# Moderate levels for responses compressed per request; pre-encoded
+# static content can afford the slowest, smallest settings.
+DYNAMIC_LEVELS = {'zstd': 3, 'br': 4, 'gzip': 6}
+STATIC_LEVELS = {'zstd': 19, 'br': 11, 'gzip': 9}
+
+
+class GzipStream:
+    def __init__(self, level: int):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        flush = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return self.compressor.compress(data) + self.compressor.flush(flush)
+
+
+class BrotliStream:
+    def __init__(self, level: int):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        body = self.compressor.process(data)
+        return body + (
+            self.compressor.finish() if final else self.compressor.flush()
+        )
+
+
+class ZstdStream:
+    def __init__(self, level: int):
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        flush = (
+            zstandard.COMPRESSOBJ_FLUSH_FINISH
+            if final
+            else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+        return self.compressor.compress(data) + self.compressor.flush(flush)
+
+
+STREAMS = {'gzip': GzipStream}
+if brotli is not None:
+    STREAMS['br'] = BrotliStream
+if zstandard is not None:
+    STREAMS['zstd'] = ZstdStream
+
+
+def available_encodings(encodings) -> list[str]:
+    return [encoding for encoding in encodings if encoding in STREAMS]
+
+
+def choose_encoding(accept_encoding: str, encodings) -> str | None:
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.partition(';')
+        try:
+            weight = float(params.strip().removeprefix('q=') or 1)
+        except ValueError:
+            weight = 0
+        weights[name.strip().lower()] = weight
+
+    # Ties go to the server's preference order.
+    best, best_weight = None, 0
+    for encoding in encodings:
+        weight = weights.get(encoding, weights.get('*', 0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+
+    return best
+
+
+def precompress(body: bytes, encodings) -> dict[str | None, bytes]:
+    variants = {None: body}
+    for encoding in available_encodings(encodings):
+        encoded = STREAMS[encoding](STATIC_LEVELS[encoding]).compress(
+            body, final=True
+        )
+        if len(encoded) < len(body):
+            variants[encoding] = encoded
+
+    return variants
+
+
+def precompressed_response(
+    request: Request, variants: dict[str | None, bytes], media_type: str
+) -> Response:
+    encoding = choose_encoding(
+        request.headers.get('Accept-Encoding', ''), list(variants)[1:]
+    )
+    headers = {'Vary': 'Accept-Encoding'}
+    if encoding:
+        headers['Content-Encoding'] = encoding
+
+    return Response(variants[encoding], media_type=media_type, headers=headers)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int, media_types, encodings):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.media_types = set(media_types)
+        self.encodings = available_encodings(encodings)
+
+    async def __call__(self, scope, receive, send):
+        encoding = scope['type'] == 'http' and choose_encoding(
+            Headers(scope=scope).get('Accept-Encoding', ''), self.encodings
+        )
+        if not encoding:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        stream = None
+
+        async def send_compressed(message):
+            nonlocal start, stream
+
+            if message['type'] == 'http.response.start':
+                headers = Headers(raw=message['headers'])
+                media_type = headers.get('Content-Type', '').partition(';')[0]
+                if (
+                    'Content-Encoding' in headers
+                    or media_type not in self.media_types
+                ):
+                    await send(message)
+                else:
+                    start = message
+                return
+
+            if start is None:
+                await send(message)
+                return
+
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+            if stream is None:
+                if not more_body and len(body) < self.minimum_size:
+                    await send(start)
+                    await send(message)
+                    start = None
+                    return
+
+                stream = STREAMS[encoding](DYNAMIC_LEVELS[encoding])
+                headers = MutableHeaders(raw=start['headers'])
+                headers['Content-Encoding'] = encoding
+                headers.add_vary_header('Accept-Encoding')
+                body = stream.compress(body, final=not more_body)
+                if more_body:
+                    del headers['Content-Length']
+                else:
+                    headers['Content-Length'] = str(len(body))
+                await send(start)
+            else:
+                body = stream.compress(body, final=not more_body)
+
+            await send({
+                'type': 'http.response.body',
+                'body': body,
+                'more_body': more_body,
+            })
+
+        await self.app(scope, receive, send_compressed)
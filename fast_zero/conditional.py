@@ -0,0 +1,25 @@
+from hashlib import sha256
+from http import HTTPStatus
+
+from fastapi import Request, Response
+
+
+def weak_etag(*parts) -> str:
+    digest = sha256(repr(parts).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored.
+    tags = {tag.strip().removeprefix('W/') for tag in header.split(',')}
+    return '*' in tags or etag.removeprefix('W/') in tags
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=HTTPStatus.NOT_MODIFIED, headers={'ETag': etag}
+    )
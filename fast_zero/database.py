@@ -1,10 +1,186 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from contextvars import ContextVar
+from hashlib import sha256
+from time import perf_counter
 
-from fast_zero.settings import Settings
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 
-engine = create_async_engine(Settings().DATABASE_URL)
+from fast_zero import metrics
+from fast_zero.cache import get_cache
+from fast_zero.settings import Settings, get_worker_count
 
+pool_wait = metrics.Histogram(
+    'db_pool_wait_seconds',
+    'Time spent waiting to check a connection out of the pool.',
+)
 
-async def get_session():
-    async with AsyncSession(engine, expire_on_commit=False) as session:
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.pool_wait = 0.0
+
+
+request_stats: ContextVar[RequestStats | None] = ContextVar(
+    'request_stats', default=None
+)
+
+
+class MeasuredQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = perf_counter() - start
+            pool_wait.observe(elapsed)
+            if stats := request_stats.get():
+                stats.pool_wait += elapsed
+
+
+def _before_cursor_execute(conn, *args):
+    conn.info['query_start'] = perf_counter()
+
+
+def _after_cursor_execute(conn, *args):
+    if stats := request_stats.get():
+        stats.queries += 1
+        stats.db_time += perf_counter() - conn.info['query_start']
+
+
+def instrument_engine(engine: AsyncEngine):
+    event.listen(
+        engine.sync_engine, 'before_cursor_execute', _before_cursor_execute
+    )
+    event.listen(
+        engine.sync_engine, 'after_cursor_execute', _after_cursor_execute
+    )
+
+
+def get_engine_options(settings: Settings) -> dict:
+    connect_args = {
+        # psycopg only prepares statements server side after this many
+        # executions; None disables it, as PgBouncer transaction mode needs.
+        'prepare_threshold': settings.DATABASE_PREPARE_THRESHOLD
+        if settings.DATABASE_PREPARED_STATEMENTS
+        else None,
+    }
+    if settings.DATABASE_STATEMENT_TIMEOUT:
+        connect_args['options'] = (
+            f'-c statement_timeout={settings.DATABASE_STATEMENT_TIMEOUT}'
+        )
+
+    if settings.DATABASE_POOL_CLASS == 'null':
+        return {'poolclass': NullPool, 'connect_args': connect_args}
+
+    return {
+        'poolclass': MeasuredQueuePool,
+        'pool_size': settings.DATABASE_POOL_SIZE,
+        'max_overflow': settings.DATABASE_MAX_OVERFLOW,
+        'pool_timeout': settings.DATABASE_POOL_TIMEOUT,
+        'pool_recycle': settings.DATABASE_POOL_RECYCLE,
+        'pool_pre_ping': settings.DATABASE_POOL_PRE_PING,
+        'connect_args': connect_args,
+    }
+
+
+# Engines live on the Database created in the app lifespan; the gauges
+# read whichever pools are currently open.
+measured_pools: list[MeasuredQueuePool] = []
+
+metrics.Gauge(
+    'db_pool_checked_out',
+    'Connections currently checked out of the pool.',
+    lambda: sum(pool.checkedout() for pool in measured_pools),
+)
+metrics.Gauge(
+    'db_pool_overflow',
+    'Connections open beyond pool_size (negative while below it).',
+    lambda: sum(pool.overflow() for pool in measured_pools),
+)
+
+
+class Database:
+    def __init__(self, settings: Settings):
+        # Clients that recently wrote keep reading from the primary for a
+        # short while, so they do not read their own writes from a lagging
+        # replica. Their next read may reach another worker, so the marks
+        # must live in the shared backend once there are several.
+        if (
+            settings.DATABASE_REPLICA_URL
+            and settings.CACHE_BACKEND == 'memory'
+            and get_worker_count(settings) > 1
+        ):
+            raise RuntimeError(
+                'DATABASE_REPLICA_URL with several workers needs '
+                "CACHE_BACKEND='redis' (or SERVER_WORKERS=1)"
+            )
+
+        self.engine = create_async_engine(
+            settings.DATABASE_URL, **get_engine_options(settings)
+        )
+        self.replica_engine = (
+            create_async_engine(
+                settings.DATABASE_REPLICA_URL, **get_engine_options(settings)
+            )
+            if settings.DATABASE_REPLICA_URL
+            else None
+        )
+        for engine in self.engines:
+            instrument_engine(engine)
+            if isinstance(engine.pool, MeasuredQueuePool):
+                measured_pools.append(engine.pool)
+
+        self.recent_writers = get_cache(
+            'recent_writer',
+            maxsize=10_000,
+            ttl=settings.DATABASE_REPLICA_STICKY_SECONDS,
+        )
+
+    @property
+    def engines(self) -> list[AsyncEngine]:
+        return list(filter(None, (self.engine, self.replica_engine)))
+
+    async def dispose(self):
+        for engine in self.engines:
+            if engine.pool in measured_pools:
+                measured_pools.remove(engine.pool)
+
+            await engine.dispose()
+
+
+def _client_key(request: Request) -> str:
+    client = request.headers.get('Authorization') or (
+        request.client and request.client.host
+    )
+    return sha256(str(client).encode()).hexdigest()
+
+
+async def get_session(request: Request):
+    database = request.app.state.database
+    is_write = request.method not in {'GET', 'HEAD', 'OPTIONS'}
+    if is_write and database.replica_engine:
+        await database.recent_writers.set(_client_key(request), True)
+
+    bind = database.engine
+    async with AsyncSession(bind, expire_on_commit=False) as session:
+        yield session
+
+
+async def get_read_session(request: Request):
+    database = request.app.state.database
+    bind = database.engine
+    if database.replica_engine and not await database.recent_writers.get(
+        _client_key(request)
+    ):
+        bind = database.replica_engine
+
+    async with AsyncSession(bind, expire_on_commit=False) as session:
         yield session
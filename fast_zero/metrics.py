@@ -0,0 +1,108 @@
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+registry = []
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ''
+
+    pairs = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    return f'{{{pairs}}}'
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self.values = {}
+        registry.append(self)
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(tuple(sorted(labels.items())), 0)
+
+    def collect(self):
+        for key, value in self.values.items():
+            yield f'{self.name}{_format_labels(dict(key))} {value}'
+
+
+class Gauge:
+    type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, function):
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+        registry.append(self)
+
+    def collect(self):
+        yield f'{self.name} {self.function()}'
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.values = {}
+        registry.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        counts, total = self.values.get(
+            key, ([0] * (len(self.buckets) + 1), 0.0)
+        )
+        counts[bisect_left(self.buckets, value)] += 1
+        self.values[key] = (counts, total + value)
+
+    def count(self, **labels) -> int:
+        counts, _ = self.values.get(tuple(sorted(labels.items())), ([], 0))
+        return sum(counts)
+
+    def collect(self):
+        for key, (counts, total) in self.values.items():
+            labels = dict(key)
+            cumulative = 0
+            for bound, count in zip(
+                (*self.buckets, '+Inf'), counts, strict=True
+            ):
+                cumulative += count
+                bucket_labels = _format_labels({**labels, 'le': bound})
+                yield f'{self.name}_bucket{bucket_labels} {cumulative}'
+
+            yield f'{self.name}_sum{_format_labels(labels)} {total}'
+            yield f'{self.name}_count{_format_labels(labels)} {cumulative}'
+
+
+def render() -> str:
+    lines = []
+    for metric in registry:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.type}')
+        lines.extend(metric.collect())
+
+    return '\n'.join(lines) + '\n'
@@ -1,11 +1,21 @@
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import DDL, Computed, ForeignKey, Index, event, func
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, registry, relationship
 
 table_registry = registry()
 
+event.listen(
+    table_registry.metadata,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm'),
+)
+
+TODO_SEARCH_CONFIG = 'simple'
+TODO_CHANGES_CHANNEL = 'todo_changes'
+
 
 class TodoState(str, Enum):
     draft = 'draft'
@@ -27,7 +37,10 @@ class User:
         init=False, server_default=func.now()
     )
     updated_at: Mapped[datetime] = mapped_column(
-        init=False, server_onupdate=func.now(), nullable=True
+        init=False,
+        onupdate=func.now(),
+        server_onupdate=func.now(),
+        nullable=True,
     )
 
     todos: Mapped[list['Todo']] = relationship(
@@ -38,6 +51,26 @@ class User:
 @table_registry.mapped_as_dataclass
 class Todo:
     __tablename__ = 'todos'
+    __table_args__ = (
+        Index('ix_todos_user_id_state', 'user_id', 'state'),
+        Index('ix_todos_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        Index('ix_todos_user_id_updated_at_id', 'user_id', 'updated_at', 'id'),
+        Index(
+            'ix_todos_search_vector', 'search_vector', postgresql_using='gin'
+        ),
+        Index(
+            'ix_todos_title_trgm',
+            'title',
+            postgresql_using='gin',
+            postgresql_ops={'title': 'gin_trgm_ops'},
+        ),
+        Index(
+            'ix_todos_description_trgm',
+            'description',
+            postgresql_using='gin',
+            postgresql_ops={'description': 'gin_trgm_ops'},
+        ),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     title: Mapped[str]
@@ -52,4 +85,136 @@ class Todo:
         init=False, server_default=func.now(), server_onupdate=func.now()
     )
 
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"to_tsvector('{TODO_SEARCH_CONFIG}', "
+            "title || ' ' || description)",
+            persisted=True,
+        ),
+        init=False,
+        repr=False,
+        deferred=True,
+    )
+
     user: Mapped[User] = relationship(init=False, back_populates='todos')
+
+
+# Every write to todos, bulk ones included, notifies listeners with a
+# small payload; clients fetch the data itself from GET /todos/changes.
+event.listen(
+    Todo.__table__,
+    'after_create',
+    DDL(f"""
+CREATE OR REPLACE FUNCTION notify_todo_change() RETURNS trigger AS $$
+DECLARE
+    todo todos;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        todo := OLD;
+    ELSE
+        todo := NEW;
+    END IF;
+    PERFORM pg_notify('{TODO_CHANGES_CHANNEL}', json_build_object(
+        'op', lower(TG_OP), 'id', todo.id, 'user_id', todo.user_id
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""),
+)
+event.listen(
+    Todo.__table__,
+    'after_create',
+    DDL(
+        'CREATE TRIGGER todos_notify_change '
+        'AFTER INSERT OR UPDATE OR DELETE ON todos '
+        'FOR EACH ROW EXECUTE FUNCTION notify_todo_change()'
+    ),
+)
+
+
+@table_registry.mapped_as_dataclass
+class TodoDeletion:
+    __tablename__ = 'todo_deletions'
+    __table_args__ = (
+        Index(
+            'ix_todo_deletions_user_id_deleted_at_id',
+            'user_id',
+            'deleted_at',
+            'id',
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    todo_id: Mapped[int]
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE')
+    )
+    deleted_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now()
+    )
+
+
+@table_registry.mapped_as_dataclass
+class TodoCount:
+    __tablename__ = 'todo_counts'
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE'), primary_key=True
+    )
+    state: Mapped[TodoState] = mapped_column(primary_key=True)
+    count: Mapped[int] = mapped_column(default=0)
+
+
+# Statement-level triggers fold every write to todos, bulk ones included,
+# into the per-(user, state) counters, so stats never scan todos. Like the
+# notify trigger they hang off the todos table, so they are only created
+# along with it.
+event.listen(
+    Todo.__table__,
+    'after_create',
+    DDL("""
+CREATE OR REPLACE FUNCTION count_todo_states() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO todo_counts AS counts (user_id, state, count)
+        SELECT user_id, state, count(*) FROM new_todos GROUP BY 1, 2
+        ON CONFLICT (user_id, state)
+        DO UPDATE SET count = counts.count + excluded.count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO todo_counts AS counts (user_id, state, count)
+        SELECT user_id, state, -count(*) FROM old_todos GROUP BY 1, 2
+        ON CONFLICT (user_id, state)
+        DO UPDATE SET count = counts.count + excluded.count;
+    ELSE
+        -- Updates that keep the state net to zero and touch no counter.
+        INSERT INTO todo_counts AS counts (user_id, state, count)
+        SELECT user_id, state, sum(delta) FROM (
+            SELECT user_id, state, 1 AS delta FROM new_todos
+            UNION ALL
+            SELECT user_id, state, -1 FROM old_todos
+        ) AS deltas
+        GROUP BY 1, 2 HAVING sum(delta) <> 0
+        ON CONFLICT (user_id, state)
+        DO UPDATE SET count = counts.count + excluded.count;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""),
+)
+for operation, transition in (
+    ('insert', 'NEW TABLE AS new_todos'),
+    ('update', 'OLD TABLE AS old_todos NEW TABLE AS new_todos'),
+    ('delete', 'OLD TABLE AS old_todos'),
+):
+    event.listen(
+        Todo.__table__,
+        'after_create',
+        DDL(
+            f'CREATE TRIGGER todos_count_{operation} '
+            f'AFTER {operation.upper()} ON todos REFERENCING {transition} '
+            'FOR EACH STATEMENT EXECUTE FUNCTION count_todo_states()'
+        ),
+    )
@@ -0,0 +1,112 @@
+import asyncio
+import json
+from collections import defaultdict
+
+import psycopg
+from sqlalchemy.engine import make_url
+
+from fast_zero import metrics
+from fast_zero.models import TODO_CHANGES_CHANNEL
+from fast_zero.settings import get_settings
+
+RESYNC = {'op': 'resync'}
+
+events_overflow = metrics.Counter(
+    'todo_events_overflow_total',
+    'Subscribers whose event queue overflowed and were asked to resync.',
+)
+
+
+def _offer(queue: asyncio.Queue, event: dict):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        # Slow consumers lose their backlog and are told to catch up
+        # through GET /todos/changes, so memory stays bounded.
+        events_overflow.inc()
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(RESYNC)
+
+
+class TodoChangeHub:
+    def __init__(self, database_url: str, queue_size: int):
+        self.conninfo = (
+            make_url(database_url)
+            .set(drivername='postgresql')
+            .render_as_string(hide_password=False)
+        )
+        self.queue_size = queue_size
+        self.subscribers = defaultdict(set)
+        self.listening = asyncio.Event()
+        self._listener = None
+
+    async def start(self):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+            self.listening.clear()
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(self.queue_size)
+        self.subscribers[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        queues = self.subscribers.get(user_id, set())
+        queues.discard(queue)
+        if not queues:
+            self.subscribers.pop(user_id, None)
+
+    def publish(self, event: dict):
+        for queue in self.subscribers.get(event['user_id'], ()):
+            _offer(queue, event)
+
+    async def _listen(self):
+        reconnecting = False
+        while True:
+            try:
+                await self._consume(resync=reconnecting)
+            except psycopg.OperationalError:  # pragma: no cover
+                self.listening.clear()
+                reconnecting = True
+                await asyncio.sleep(1)
+
+    async def _consume(self, resync: bool):
+        async with await psycopg.AsyncConnection.connect(
+            self.conninfo, autocommit=True
+        ) as conn:
+            await conn.execute(f'LISTEN {TODO_CHANGES_CHANNEL}')
+            self.listening.set()
+
+            # Notifications sent while disconnected are lost.
+            if resync:  # pragma: no cover
+                for queues in self.subscribers.values():
+                    for queue in queues:
+                        _offer(queue, RESYNC)
+
+            async for notify in conn.notifies():
+                self.publish(json.loads(notify.payload))
+
+    async def stream(self, user_id: int, keepalive: float):
+        queue = self.subscribe(user_id)
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), keepalive)
+                except TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+
+                yield f'event: {event["op"]}\ndata: {json.dumps(event)}\n\n'
+        finally:
+            self.unsubscribe(user_id, queue)
+
+
+settings = get_settings()
+hub = TodoChangeHub(settings.DATABASE_URL, settings.TODO_EVENTS_QUEUE_SIZE)
@@ -0,0 +1,166 @@
+import math
+from http import HTTPStatus
+from time import monotonic
+
+from fastapi import HTTPException, Request
+
+from fast_zero import metrics
+from fast_zero.cache import LRUCache
+from fast_zero.settings import get_settings
+
+try:
+    from redis import asyncio as redis
+except ImportError:  # pragma: no cover
+    redis = None
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600}
+
+# Refills the bucket from the elapsed time, takes one token if there is
+# one and returns how long to wait otherwise; atomic on the server.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - updated) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call(
+    'HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now)
+)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(retry_after)
+"""
+
+rate_limited = metrics.Counter(
+    'rate_limited_requests_total', 'Requests rejected by a rate limit.'
+)
+
+registry = []
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    capacity, _, period = rate.partition('/')
+    return int(capacity), PERIODS[period]
+
+
+class MemoryBucketStore:
+    def __init__(self, namespace: str, capacity: int, period: float):
+        self.namespace = namespace
+        self.capacity = capacity
+        self.rate = capacity / period
+        # Idle buckets are full again after one period and can be dropped.
+        self.buckets = LRUCache(get_settings().RATE_LIMIT_MAXSIZE, ttl=period)
+
+    async def hit(self, key: str) -> float:
+        now = monotonic()
+        tokens, updated = self.buckets.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / self.rate
+
+        self.buckets.set(key, (tokens, now))
+        return retry_after
+
+    async def clear(self):
+        self.buckets.clear()
+
+
+class RedisBucketStore:
+    def __init__(self, namespace: str, capacity: int, period: float, url):
+        if redis is None:  # pragma: no cover
+            raise RuntimeError('The redis rate limit backend requires `redis`')
+
+        self.namespace = namespace
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.client = redis.from_url(url)
+        self.script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def _key(self, key) -> str:
+        return f'fast_zero:ratelimit:{self.namespace}:{key}'
+
+    async def hit(self, key: str) -> float:
+        return float(
+            await self.script(
+                keys=[self._key(key)], args=[self.capacity, self.rate]
+            )
+        )
+
+    async def clear(self):
+        async for key in self.client.scan_iter(self._key('*')):
+            await self.client.delete(key)
+
+
+def get_bucket_store(namespace: str, rate: str):
+    settings = get_settings()
+    capacity, period = parse_rate(rate)
+
+    if settings.RATE_LIMIT_BACKEND == 'redis':
+        return RedisBucketStore(
+            namespace, capacity, period, settings.CACHE_REDIS_URL
+        )
+
+    return MemoryBucketStore(namespace, capacity, period)
+
+
+# X-Forwarded-For is only honoured from SERVER_FORWARDED_ALLOW_IPS, since
+# its leftmost entry is whatever the client sent. Behind an edge that
+# overwrites its own client address header, such as Fly-Client-IP, that
+# header is the only trustworthy source. Requests that bypass the edge
+# (health checks, local calls) lack it and fall back to the peer address,
+# so they are still limited rather than let through unkeyed.
+async def client_ip(request: Request) -> str | None:
+    header = get_settings().RATE_LIMIT_CLIENT_IP_HEADER
+    if header and (ip := request.headers.get(header)):
+        return ip
+
+    return request.client and request.client.host
+
+
+async def submitted_username(request: Request) -> str | None:
+    # FastAPI has already parsed the form; Starlette caches it.
+    username = (await request.form()).get('username')
+    return username and username.strip().lower()
+
+
+class RateLimit:
+    def __init__(self, namespace: str, rate: str | None, key=client_ip):
+        self.namespace = namespace
+        self.key = key
+        self.store = rate and get_bucket_store(namespace, rate)
+        registry.append(self)
+
+    async def __call__(self, request: Request):
+        if not self.store:
+            return
+
+        key = await self.key(request)
+        if key is None:
+            return
+
+        retry_after = await self.store.hit(key)
+        if retry_after:
+            rate_limited.inc(limit=self.namespace)
+            raise HTTPException(
+                status_code=HTTPStatus.TOO_MANY_REQUESTS,
+                detail='Too many requests',
+                headers={'Retry-After': str(math.ceil(retry_after))},
+            )
+
+
+async def clear():
+    for limit in registry:
+        if limit.store:
+            await limit.store.clear()
@@ -0,0 +1,34 @@
+from functools import cache
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+
+@cache
+def get_adapter(schema) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+class ModelResponse(Response):
+    media_type = 'application/json'
+
+    def __init__(self, schema, content, **kwargs):
+        self.adapter = get_adapter(schema)
+        super().__init__(content, **kwargs)
+
+    def render(self, content) -> bytes:
+        # One validation straight to JSON bytes, instead of FastAPI's
+        # validate, convert to Python and json.dumps round.
+        return render_json(self.adapter, content)
+
+
+def render_json(adapter: TypeAdapter, content) -> bytes:
+    return adapter.dump_json(
+        adapter.validate_python(content, from_attributes=True)
+    )
+
+
+# Selecting only the columns a public schema exposes skips hydrating full
+# entities and the identity map; rows validate through from_attributes.
+def public_columns(entity, schema) -> list:
+    return [getattr(entity, field) for field in schema.model_fields]
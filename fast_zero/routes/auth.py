@@ -9,21 +9,38 @@ from sqlalchemy.orm import Session
 from fast_zero import security
 from fast_zero.database import get_session
 from fast_zero.models import User
+from fast_zero.ratelimit import RateLimit, submitted_username
 from fast_zero.schemas import Token
+from fast_zero.settings import get_settings
 
 router = APIRouter(prefix='/auth', tags=['Auth'])
 
 T_FormData = Annotated[OAuth2PasswordRequestForm, Depends()]
 T_AsyncSession = Annotated[Session, Depends(get_session)]
 
+settings = get_settings()
 
-@router.post('/token', response_model=Token)
+login_ip_limit = RateLimit('login_ip', settings.RATE_LIMIT_LOGIN_IP)
+login_username_limit = RateLimit(
+    'login_username',
+    settings.RATE_LIMIT_LOGIN_USERNAME,
+    key=submitted_username,
+)
+
+
+# Route dependencies run before the session and the Argon2 verify, so
+# throttled attempts cost no database or hashing work.
+@router.post(
+    '/token',
+    response_model=Token,
+    dependencies=[Depends(login_ip_limit), Depends(login_username_limit)],
+)
 async def login_for_token(session: T_AsyncSession, form_data: T_FormData):
     user = await session.scalar(
         select(User).where(User.email == form_data.username)
     )
 
-    if not user or not security.verify_password(
+    if not user or not await security.verify_password_async(
         form_data.password, user.password
     ):
         raise HTTPException(
@@ -1,56 +1,256 @@
+import csv
+import io
+from datetime import datetime, timedelta
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import (
+    DateTime,
+    Integer,
+    String,
+    any_,
+    bindparam,
+    cast,
+    column,
+    delete,
+    func,
+    insert,
+    select,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Session
 
-from fast_zero import security
-from fast_zero.database import get_session
-from fast_zero.models import Todo, TodoState, User
+from fast_zero import notifications, security
+from fast_zero.conditional import is_not_modified, not_modified, weak_etag
+from fast_zero.database import get_read_session, get_session
+from fast_zero.models import (
+    TODO_SEARCH_CONFIG,
+    Todo,
+    TodoCount,
+    TodoDeletion,
+    TodoState,
+    User,
+)
+from fast_zero.pagination import decode_cursor, encode_cursor
+from fast_zero.ratelimit import RateLimit
+from fast_zero.responses import ModelResponse, public_columns
 from fast_zero.schemas import (
+    ExportFormat,
     Message,
+    TodoBulkResult,
+    TodoBulkUpdate,
+    TodoChanges,
     TodoList,
     TodoPublic,
     TodoSchema,
+    TodoStats,
     TodoUpdate,
 )
+from fast_zero.settings import get_settings
 
-router = APIRouter(prefix='/todos', tags=['Todos'])
+settings = get_settings()
+
+router = APIRouter(
+    prefix='/todos',
+    tags=['Todos'],
+    dependencies=[Depends(RateLimit('todos', settings.RATE_LIMIT_TODOS))],
+)
 
 T_Session = Annotated[Session, Depends(get_session)]
+T_ReadSession = Annotated[Session, Depends(get_read_session)]
 T_CurrentUser = Annotated[User, Depends(security.get_current_user)]
 
+_batch = Body(min_length=1, max_length=settings.TODO_BULK_MAX_ITEMS)
+T_TodoBatch = Annotated[list[TodoSchema], _batch]
+T_TodoUpdateBatch = Annotated[list[TodoBulkUpdate], _batch]
+T_TodoIdBatch = Annotated[list[int], _batch]
+
+EXPORT_FIELDS = tuple(TodoPublic.model_fields)
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.ndjson: 'application/x-ndjson',
+    ExportFormat.csv: 'text/csv',
+}
+
+# Change feed entries are ordered by (timestamp, kind, id) so a single
+# cursor can resume across updated todos and deletion tombstones.
+CHANGE_UPDATED = 0
+CHANGE_DELETED = 1
+
+
+def _delete_and_log(user_id: int, *criteria):
+    # Deleting, recording the tombstones and pruning the user's expired ones
+    # in one statement keeps deletes a single round trip.
+    deleted = (
+        delete(Todo)
+        .where(Todo.user_id == user_id, *criteria)
+        .returning(Todo.id, Todo.user_id)
+        .cte('deleted')
+    )
+    expired = (
+        delete(TodoDeletion)
+        .where(
+            TodoDeletion.user_id == user_id,
+            TodoDeletion.deleted_at
+            < func.now()
+            - timedelta(days=settings.TODO_CHANGES_RETENTION_DAYS),
+        )
+        .cte('expired')
+    )
+    return (
+        insert(TodoDeletion)
+        .from_select(
+            ['todo_id', 'user_id'], select(deleted.c.id, deleted.c.user_id)
+        )
+        .add_cte(expired)
+        .returning(TodoDeletion.todo_id)
+    )
+
 
 @router.post('/', response_model=TodoPublic, status_code=HTTPStatus.CREATED)
 async def create_todo(
     todo: TodoSchema, session: T_Session, current_user: T_CurrentUser
 ):
-    db_todo = Todo(
-        title=todo.title,
-        description=todo.description,
-        state=todo.state,
-        user_id=current_user.id,
+    db_todo = await session.scalar(
+        insert(Todo)
+        .values(**todo.model_dump(), user_id=current_user.id)
+        .returning(Todo)
     )
-
-    session.add(db_todo)
     await session.commit()
-    await session.refresh(db_todo)
 
     return db_todo
 
 
+@router.post(
+    '/bulk', response_model=TodoBulkResult, status_code=HTTPStatus.CREATED
+)
+async def create_todos(
+    todos: T_TodoBatch,
+    session: T_Session,
+    current_user: T_CurrentUser,
+):
+    db_todos = await session.scalars(
+        insert(Todo).returning(Todo, sort_by_parameter_order=True),
+        [{**todo.model_dump(), 'user_id': current_user.id} for todo in todos],
+    )
+    results = [
+        {'id': db_todo.id, 'status': HTTPStatus.CREATED, 'todo': db_todo}
+        for db_todo in db_todos
+    ]
+    await session.commit()
+
+    return {'results': results}
+
+
+@router.patch('/bulk', response_model=TodoBulkResult)
+async def patch_todos(
+    todos: T_TodoUpdateBatch,
+    session: T_Session,
+    current_user: T_CurrentUser,
+):
+    changes = values(
+        column('id', Integer),
+        column('title', String),
+        column('description', String),
+        column('state', String),
+        name='changes',
+    ).data([
+        (todo.id, todo.title, todo.description, todo.state)
+        for todo in {todo.id: todo for todo in todos}.values()
+    ])
+
+    db_todos = await session.scalars(
+        update(Todo)
+        .where(Todo.id == changes.c.id, Todo.user_id == current_user.id)
+        .values(
+            title=func.coalesce(changes.c.title, Todo.title),
+            description=func.coalesce(changes.c.description, Todo.description),
+            state=func.coalesce(
+                cast(changes.c.state, Todo.__table__.c.state.type), Todo.state
+            ),
+            updated_at=func.now(),
+        )
+        .returning(Todo)
+        .execution_options(populate_existing=True)
+    )
+    updated = {db_todo.id: db_todo for db_todo in db_todos}
+    await session.commit()
+
+    return {
+        'results': [
+            {'id': todo.id, 'status': HTTPStatus.OK, 'todo': updated[todo.id]}
+            if todo.id in updated
+            else {'id': todo.id, 'status': HTTPStatus.NOT_FOUND}
+            for todo in todos
+        ]
+    }
+
+
+@router.delete('/bulk', response_model=TodoBulkResult)
+async def delete_todos(
+    todo_ids: T_TodoIdBatch,
+    session: T_Session,
+    current_user: T_CurrentUser,
+):
+    deleted = set(
+        await session.scalars(
+            _delete_and_log(
+                current_user.id,
+                Todo.id == any_(bindparam('ids', todo_ids, ARRAY(Integer))),
+            )
+        )
+    )
+    await session.commit()
+
+    return {
+        'results': [
+            {
+                'id': todo_id,
+                'status': HTTPStatus.OK
+                if todo_id in deleted
+                else HTTPStatus.NOT_FOUND,
+            }
+            for todo_id in todo_ids
+        ]
+    }
+
+
 @router.get('/', response_model=TodoList)
 async def list_todos(  # noqa
-    session: T_Session,
+    session: T_ReadSession,
     current_user: T_CurrentUser,
+    request: Request,
+    q: str | None = None,
     title: str | None = None,
     description: str | None = None,
     state: TodoState | None = None,
-    offset: int | None = None,
-    limit: int | None = None,
+    offset: Annotated[int | None, Query(ge=0)] = None,
+    limit: Annotated[int | None, Query(ge=1)] = None,
+    cursor: str | None = None,
 ):
-    query = select(Todo).where(Todo.user_id == current_user.id)
+    # Any change to the user's todos moves the count or the sum of their
+    # updated_at, so polling clients get a 304 without the list query being
+    # run. A max would miss a write that commits after a later-started one.
+    count, updated_at_sum = (
+        await session.execute(
+            select(
+                func.count(), func.sum(func.extract('epoch', Todo.updated_at))
+            ).where(Todo.user_id == current_user.id)
+        )
+    ).one()
+    etag = weak_etag(
+        current_user.id, count, updated_at_sum, str(request.query_params)
+    )
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    query = select(*public_columns(Todo, TodoPublic)).where(
+        Todo.user_id == current_user.id
+    )
 
     if title:
         query = query.filter(Todo.title.contains(title))
@@ -61,25 +261,249 @@ async def list_todos(  # noqa
     if state:
         query = query.filter(Todo.state == state)
 
-    todos = await session.scalars(query.offset(offset).limit(limit))
+    if q:
+        if cursor:
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST,
+                detail='Cursor pagination is not supported with q',
+            )
+
+        ts_query = func.websearch_to_tsquery(TODO_SEARCH_CONFIG, q)
+        query = query.where(Todo.search_vector.bool_op('@@')(ts_query))
+        query = query.order_by(
+            func.ts_rank(Todo.search_vector, ts_query).desc()
+        )
+
+    if cursor:
+        created_at, todo_id = decode_cursor(cursor, datetime, int)
+        query = query.where(
+            tuple_(Todo.created_at, Todo.id) > tuple_(created_at, todo_id)
+        )
+
+    # One extra row tells whether there is a next page.
+    query = query.order_by(Todo.created_at, Todo.id).offset(offset)
+    if limit is not None:
+        query = query.limit(limit + 1)
+
+    todos = (await session.execute(query)).all()
+
+    next_cursor = None
+    if limit is not None and len(todos) > limit:
+        todos = todos[:limit]
+        if not q:
+            next_cursor = encode_cursor(todos[-1].created_at, todos[-1].id)
+
+    return ModelResponse(
+        TodoList,
+        {'todos': todos, 'next_cursor': next_cursor},
+        headers={'ETag': etag},
+    )
+
+
+# Timestamps come from now(), the start of the writing transaction, but
+# rows become visible in commit order: a change stamped before the newest
+# one returned may still commit. Changes younger than the horizon are
+# returned but the cursor stops before them, so they are sent again on the
+# next call. Every change is delivered at least once, provided no write
+# transaction runs longer than TODO_CHANGES_SAFETY_LAG; clients apply
+# changes idempotently, by id. Tombstones are kept for
+# TODO_CHANGES_RETENTION_DAYS, so older cursors get 410 and must resync.
+@router.get('/changes', response_model=TodoChanges)
+async def list_todo_changes(
+    session: T_ReadSession,
+    current_user: T_CurrentUser,
+    since: str | None = None,
+    limit: Annotated[int, Query(ge=1)] = 100,
+):
+    todos = select(*public_columns(Todo, TodoPublic)).where(
+        Todo.user_id == current_user.id
+    )
+    deletions = select(
+        TodoDeletion.id, TodoDeletion.todo_id, TodoDeletion.deleted_at
+    ).where(TodoDeletion.user_id == current_user.id)
+
+    if since:
+        changed_at, kind, change_id = decode_cursor(since, datetime, int, int)
+        if kind == CHANGE_UPDATED:
+            todos = todos.where(
+                tuple_(Todo.updated_at, Todo.id)
+                > tuple_(changed_at, change_id)
+            )
+            deletions = deletions.where(TodoDeletion.deleted_at >= changed_at)
+        else:
+            todos = todos.where(Todo.updated_at > changed_at)
+            deletions = deletions.where(
+                tuple_(TodoDeletion.deleted_at, TodoDeletion.id)
+                > tuple_(changed_at, change_id)
+            )
+
+    # On a replica, changes committed on the primary after the last replayed
+    # transaction are not visible yet either.
+    now = func.coalesce(func.pg_last_xact_replay_timestamp(), func.now())
+    horizon, retained_since = (
+        await session.execute(
+            select(
+                cast(
+                    now - timedelta(seconds=settings.TODO_CHANGES_SAFETY_LAG),
+                    DateTime,
+                ),
+                cast(
+                    now - timedelta(days=settings.TODO_CHANGES_RETENTION_DAYS),
+                    DateTime,
+                ),
+            )
+        )
+    ).one()
+    if since and changed_at < retained_since:
+        raise HTTPException(
+            status_code=HTTPStatus.GONE,
+            detail='Cursor expired; list todos again to resync',
+        )
+
+    updated = await session.execute(
+        todos.order_by(Todo.updated_at, Todo.id).limit(limit + 1)
+    )
+    deleted = await session.execute(
+        deletions.order_by(TodoDeletion.deleted_at, TodoDeletion.id).limit(
+            limit + 1
+        )
+    )
+    changes = sorted(
+        [(todo.updated_at, CHANGE_UPDATED, todo.id, todo) for todo in updated]
+        + [
+            (deletion.deleted_at, CHANGE_DELETED, deletion.id, deletion)
+            for deletion in deleted
+        ],
+        key=lambda change: change[:3],
+    )[: limit + 1]
+
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    # Changes are sorted, so the settled ones are a prefix and anything
+    # past the page is younger than the horizon whenever the page is not.
+    settled = [change for change in changes if change[0] < horizon]
+    has_more = has_more and len(settled) == len(changes)
+
+    return {
+        'todos': [
+            change for _, kind, _, change in changes if kind == CHANGE_UPDATED
+        ],
+        'deleted': [
+            change.todo_id
+            for _, kind, _, change in changes
+            if kind == CHANGE_DELETED
+        ],
+        'next_cursor': encode_cursor(*settled[-1][:3]) if settled else since,
+        'has_more': has_more,
+    }
+
 
-    return {'todos': todos.all()}
+@router.get('/stats', response_model=TodoStats)
+async def get_todo_stats(session: T_ReadSession, current_user: T_CurrentUser):
+    counts = dict(
+        (
+            await session.execute(
+                select(TodoCount.state, TodoCount.count).where(
+                    TodoCount.user_id == current_user.id
+                )
+            )
+        ).all()
+    )
+    states = {state: counts.get(state, 0) for state in TodoState}
+
+    return {'total': sum(states.values()), 'states': states}
+
+
+def _csv_value(value):
+    if isinstance(value, TodoState):
+        return value.value
+
+    if isinstance(value, datetime):
+        return value.isoformat()
+
+    return value
+
+
+def _serialize_export(rows, export_format: ExportFormat) -> str:
+    if export_format == ExportFormat.ndjson:
+        return ''.join(
+            TodoPublic.model_validate(row._asdict()).model_dump_json() + '\n'
+            for row in rows
+        )
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(_csv_value(value) for value in row)
+
+    return buffer.getvalue()
+
+
+@router.get('/export')
+async def export_todos(
+    session: T_ReadSession,
+    current_user: T_CurrentUser,
+    export_format: Annotated[ExportFormat, Query(alias='format')] = (
+        ExportFormat.ndjson
+    ),
+):
+    query = (
+        select(*public_columns(Todo, TodoPublic))
+        .where(Todo.user_id == current_user.id)
+        .order_by(Todo.created_at, Todo.id)
+        .execution_options(yield_per=settings.TODO_EXPORT_BATCH_SIZE)
+    )
+
+    async def export():
+        # The request's session may already be closed by the time the body
+        # streams, so the stream checks out its own connection and frees it.
+        try:
+            if export_format == ExportFormat.csv:
+                yield ','.join(EXPORT_FIELDS) + '\r\n'
+
+            result = await session.stream(query)
+            async for rows in result.partitions():
+                yield _serialize_export(rows, export_format)
+        finally:
+            await session.close()
+
+    return StreamingResponse(
+        export(),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename="todos.{export_format.value}"'
+            )
+        },
+    )
+
+
+@router.get('/events')
+async def stream_todo_events(current_user: T_CurrentUser):
+    await notifications.hub.start()
+
+    return StreamingResponse(
+        notifications.hub.stream(
+            current_user.id, settings.TODO_EVENTS_KEEPALIVE
+        ),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache'},
+    )
 
 
 @router.delete('/{todo_id}', response_model=Message)
 async def delete_todo(
     todo_id: int, session: T_Session, current_user: T_CurrentUser
 ):
-    todo = await session.scalar(
-        select(Todo).where(Todo.user_id == current_user.id, Todo.id == todo_id)
+    deleted_id = await session.scalar(
+        _delete_and_log(current_user.id, Todo.id == todo_id)
     )
 
-    if not todo:
+    if not deleted_id:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail='Task not found'
         )
 
-    await session.delete(todo)
     await session.commit()
 
     return {'message': 'Task has been deleted successfully'}
@@ -93,7 +517,11 @@ async def patch_todo(
     current_user: T_CurrentUser,
 ):
     db_todo = await session.scalar(
-        select(Todo).where(Todo.user_id == current_user.id, Todo.id == todo_id)
+        update(Todo)
+        .where(Todo.user_id == current_user.id, Todo.id == todo_id)
+        .values(**todo.model_dump(exclude_unset=True), updated_at=func.now())
+        .returning(Todo)
+        .execution_options(populate_existing=True)
     )
 
     if not db_todo:
@@ -101,11 +529,6 @@ async def patch_todo(
             status_code=HTTPStatus.NOT_FOUND, detail='Task not found'
         )
 
-    for key, value in todo.model_dump(exclude_unset=True).items():
-        setattr(db_todo, key, value)
-
-    session.add(db_todo)
     await session.commit()
-    await session.refresh(db_todo)
 
     return db_todo
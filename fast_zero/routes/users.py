@@ -1,42 +1,94 @@
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from fast_zero import security
+from fast_zero.cache import LoadingCache, get_cache, get_cache_ttl
+from fast_zero.conditional import is_not_modified, not_modified, weak_etag
 from fast_zero.database import get_session
 from fast_zero.models import User
+from fast_zero.pagination import decode_cursor, encode_cursor
+from fast_zero.ratelimit import RateLimit
+from fast_zero.responses import get_adapter, public_columns, render_json
 from fast_zero.schemas import UserList, UserPublic, UserSchema
+from fast_zero.settings import get_settings
 
-router = APIRouter(prefix='/users', tags=['Users'])
+settings = get_settings()
+
+router = APIRouter(
+    prefix='/users',
+    tags=['Users'],
+    dependencies=[Depends(RateLimit('users', settings.RATE_LIMIT_USERS))],
+)
 
 T_Session = Annotated[Session, Depends(get_session)]
 T_CurrentUser = Annotated[User, Depends(security.get_current_user)]
 
 
-@router.post('/', status_code=HTTPStatus.CREATED, response_model=UserPublic)
+signup_limit = RateLimit('signup_ip', settings.RATE_LIMIT_SIGNUP_IP)
+
+# Postgres' default names for the unique constraints on models.User.
+UNIQUE_FIELDS = {'users_username_key': 'Username', 'users_email_key': 'Email'}
+
+# Public reads are cached; writes drop the user and every cached page.
+# Misses load from the primary: a lagging replica would otherwise refill
+# the cache with data the write just invalidated.
+user_cache_ttl = get_cache_ttl(
+    settings, settings.USER_CACHE_TTL, settings.USER_CACHE_LOCAL_TTL
+)
+user_cache = LoadingCache(
+    get_cache('user', settings.USER_CACHE_MAXSIZE, user_cache_ttl)
+)
+user_page_cache = LoadingCache(
+    get_cache('user_page', settings.USER_CACHE_MAXSIZE, user_cache_ttl)
+)
+
+
+async def invalidate_users(*user_ids: int):
+    for user_id in user_ids:
+        await user_cache.delete(str(user_id))
+
+    await user_page_cache.clear()
+
+
+@router.post(
+    '/',
+    status_code=HTTPStatus.CREATED,
+    response_model=UserPublic,
+    dependencies=[Depends(signup_limit)],
+)
 async def save_user(session: T_Session, user: UserSchema):
-    db_user = await session.scalar(
-        select(User).where(
-            (User.username == user.username) | (User.email == user.email)
-        )
-    )
+    password = await security.get_password_hash_async(user.password)
+    db_user = User(username=user.username, password=password, email=user.email)
+
+    # The unique constraints decide duplicates: one INSERT, no race with a
+    # concurrent sign-up between a lookup and the insert.
+    session.add(db_user)
+    try:
+        await session.commit()
+    except IntegrityError as exc:
+        await session.rollback()
+        field = UNIQUE_FIELDS.get(exc.orig.diag.constraint_name)
+        if field is None:  # pragma: no cover
+            raise
 
-    if db_user:
-        field = 'Username' if db_user.username == user.username else 'Email'
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST,
             detail=f'{field} already exists',
         )
 
-    password = security.get_password_hash(user.password)
-    db_user = User(username=user.username, password=password, email=user.email)
-
-    session.add(db_user)
-    await session.commit()
-    await session.refresh(db_user)
+    await invalidate_users()
 
     return db_user
 
@@ -53,31 +105,101 @@ async def update_user(
             status_code=HTTPStatus.FORBIDDEN, detail='Not enough permission'
         )
 
+    subject = current_user.email
     current_user.username = user.username
     current_user.email = user.email
-    current_user.password = security.get_password_hash(user.password)
+    current_user.password = await security.get_password_hash_async(
+        user.password
+    )
     session.add(current_user)
     await session.commit()
+    await security.invalidate_principal(subject, current_user.email)
+    await invalidate_users(current_user.id)
     await session.refresh(current_user)
 
     return current_user
 
 
+def _render_users_page(users: list, next_cursor: str | None) -> str:
+    return render_json(
+        get_adapter(UserList), {'users': users, 'next_cursor': next_cursor}
+    ).decode()
+
+
+async def _load_users_page(
+    session: Session, skip: int, limit: int, after_id: int | None
+) -> str | None:
+    query = select(*public_columns(User, UserPublic))
+
+    if after_id is not None:
+        query = query.where(User.id > after_id)
+
+    users = (
+        await session.execute(
+            query.order_by(User.id).offset(skip).limit(limit + 1)
+        )
+    ).all()
+    # Pages past the end are not cached, so arbitrary skips and cursors
+    # cannot fill the cache with empty entries.
+    if not users:
+        return None
+
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1].id)
+
+    return _render_users_page(users, next_cursor)
+
+
 @router.get('/', response_model=UserList)
-async def get_users(session: T_Session, skip: int = 0, limit: int = 100):
-    users = await session.scalars(select(User).offset(skip).limit(limit))
-    return {'users': users.all()}
+async def get_users(
+    session: T_Session,
+    skip: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=1, le=100)] = 100,
+    cursor: str | None = None,
+):
+    # Key on the decoded cursor: equivalent encodings share one entry and
+    # malformed ones are rejected before they reach the cache.
+    after_id = decode_cursor(cursor, int)[0] if cursor else None
+    page = await user_page_cache.get_or_load(
+        f'{skip}:{limit}:{after_id}',
+        lambda: _load_users_page(session, skip, limit, after_id),
+    )
+
+    return Response(
+        page or _render_users_page([], None), media_type='application/json'
+    )
 
 
-@router.get('/{user_id}', response_model=UserPublic)
-async def get_user(session: T_Session, user_id: int):
+async def _load_user(session: Session, user_id: int) -> dict | None:
     db_user = await session.scalar(select(User).where(User.id == user_id))
     if not db_user:
+        return None
+
+    return {
+        'user': UserPublic.model_validate(db_user).model_dump(mode='json'),
+        'etag': weak_etag(db_user.id, db_user.created_at, db_user.updated_at),
+    }
+
+
+@router.get('/{user_id}', response_model=UserPublic)
+async def get_user(
+    session: T_Session, request: Request, response: Response, user_id: int
+):
+    cached = await user_cache.get_or_load(
+        str(user_id), lambda: _load_user(session, user_id)
+    )
+    if not cached:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail='User not found'
         )
 
-    return db_user
+    if is_not_modified(request, cached['etag']):
+        return not_modified(cached['etag'])
+
+    response.headers['ETag'] = cached['etag']
+    return cached['user']
 
 
 @router.delete('/{user_id}', response_model=UserPublic)
@@ -93,4 +215,6 @@ async def delete_user(
 
     await session.delete(current_user)
     await session.commit()
+    await security.invalidate_principal(current_user.email)
+    await invalidate_users(current_user.id)
     return current_user
@@ -1,5 +1,15 @@
+import asyncio
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
 from datetime import datetime, timedelta
+from functools import cache
+from hashlib import sha256
 from http import HTTPStatus
+from threading import BoundedSemaphore
+from time import perf_counter, time
 from typing import Any
 
 from fastapi import Depends, HTTPException
@@ -7,18 +17,59 @@ from fastapi.security import OAuth2PasswordBearer
 from jwt import PyJWTError, decode, encode
 from pwdlib import PasswordHash
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 from zoneinfo import ZoneInfo
 
+from fast_zero import metrics
+from fast_zero.cache import LRUCache, get_cache, get_cache_ttl
 from fast_zero.database import get_session
 from fast_zero.models import User
-from fast_zero.settings import Settings
+from fast_zero.settings import Settings, get_settings
 
 pwd_context = PasswordHash.recommended()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
 
 
-settings = Settings()
+settings = get_settings()
+
+password_hash_duration = metrics.Histogram(
+    'password_hash_duration_seconds',
+    'Time spent hashing or verifying passwords, including queue wait.',
+)
+password_hash_rejected = metrics.Counter(
+    'password_hash_rejected_total',
+    'Password hashing jobs rejected because the pool was saturated.',
+)
+
+token_cache_requests = metrics.Counter(
+    'token_cache_requests_total',
+    'Verified token cache lookups, labelled by hit or miss.',
+)
+
+token_cache = LRUCache(maxsize=settings.TOKEN_CACHE_MAXSIZE, ttl=0)
+
+
+def get_principal_cache_ttl(settings: Settings) -> float:
+    return get_cache_ttl(
+        settings,
+        settings.PRINCIPAL_CACHE_TTL,
+        settings.PRINCIPAL_CACHE_LOCAL_TTL,
+    )
+
+
+principal_cache = get_cache(
+    'principal',
+    maxsize=settings.PRINCIPAL_CACHE_MAXSIZE,
+    ttl=get_principal_cache_ttl(settings),
+)
+principal_invalidations = metrics.Counter(
+    'principal_cache_invalidations_total',
+    'Principals dropped from the cache after a user changed.',
+)
+
+_password_hash_slots = BoundedSemaphore(
+    settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE
+)
 
 
 def get_password_hash(password: str) -> str:
@@ -29,6 +80,54 @@ def verify_password(password: str, hashed_password: str) -> bool:
     return pwd_context.verify(password, hashed_password)
 
 
+@cache
+def get_password_hash_executor() -> Executor:
+    if settings.PASSWORD_HASH_EXECUTOR == 'process':
+        return ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+
+    return ThreadPoolExecutor(
+        max_workers=settings.PASSWORD_HASH_WORKERS,
+        thread_name_prefix='password-hash',
+    )
+
+
+async def _run_password_job(operation: str, func, *args):
+    if not _password_hash_slots.acquire(blocking=False):
+        password_hash_rejected.inc(operation=operation)
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            detail='Server is busy, try again later',
+            headers={'Retry-After': str(settings.PASSWORD_HASH_RETRY_AFTER)},
+        )
+
+    start = perf_counter()
+    try:
+        future = get_password_hash_executor().submit(func, *args)
+    except BaseException:
+        _password_hash_slots.release()
+        raise
+
+    # The slot is only freed once the worker is done, even if the
+    # request awaiting it gets cancelled.
+    future.add_done_callback(lambda _: _password_hash_slots.release())
+    try:
+        return await asyncio.wrap_future(future)
+    finally:
+        password_hash_duration.observe(
+            perf_counter() - start, operation=operation
+        )
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_password_job('hash', get_password_hash, password)
+
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    return await _run_password_job(
+        'verify', verify_password, password, hashed_password
+    )
+
+
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
 
@@ -44,10 +143,52 @@ def create_access_token(data: dict) -> str:
 
 
 def decode_access_token(token: str) -> dict[str, Any]:
-    return decode(
+    key = sha256(token.encode()).digest()
+
+    payload = token_cache.get(key)
+    if payload is not None:
+        token_cache_requests.inc(result='hit')
+        return payload
+
+    token_cache_requests.inc(result='miss')
+    payload = decode(
         token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
     )
 
+    # Claims are only reused while the token would still pass validation.
+    if 'exp' in payload:
+        token_cache.set(key, payload, ttl=payload['exp'] - time())
+
+    return payload
+
+
+def _dump_principal(user: User) -> dict[str, Any]:
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'created_at': user.created_at.isoformat(),
+        'updated_at': user.updated_at and user.updated_at.isoformat(),
+    }
+
+
+def _load_principal(data: dict[str, Any]) -> User:
+    user = User(username=data['username'], password='', email=data['email'])
+    user.id = data['id']
+    user.created_at = datetime.fromisoformat(data['created_at'])
+    user.updated_at = data['updated_at'] and datetime.fromisoformat(
+        data['updated_at']
+    )
+    make_transient_to_detached(user)
+
+    return user
+
+
+async def invalidate_principal(*subjects: str):
+    principal_invalidations.inc()
+    for subject in subjects:
+        await principal_cache.delete(subject)
+
 
 async def get_current_user(
     session: Session = Depends(get_session),
@@ -67,9 +208,23 @@ async def get_current_user(
     if not username:
         raise credentials_exception
 
+    cached_user = await principal_cache.get(username)
+    if cached_user:
+        # Attaches the cached row to this session without emitting SQL, so
+        # handlers can still modify or delete it. The password hash is not
+        # cached, so it is left unloaded rather than blank.
+        user = await session.merge(_load_principal(cached_user), load=False)
+        session.expire(user, ['password'])
+        return user
+
+    # A load racing with an invalidation must not store the stale row.
+    generation = principal_invalidations.get()
     user = await session.scalar(select(User).where(User.email == username))
 
     if not user:
         raise credentials_exception
 
+    if principal_invalidations.get() == generation:
+        await principal_cache.set(username, _dump_principal(user))
+
     return user
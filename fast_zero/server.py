@@ -0,0 +1,30 @@
+import uvicorn
+
+from fast_zero.settings import Settings, get_settings, get_worker_count
+
+
+def get_server_options(settings: Settings) -> dict:
+    return {
+        'host': settings.SERVER_HOST,
+        'port': settings.SERVER_PORT,
+        # Each connection pool is per worker, so the database sees up to
+        # workers * (DATABASE_POOL_SIZE + DATABASE_MAX_OVERFLOW).
+        'workers': get_worker_count(settings),
+        'loop': settings.SERVER_LOOP,
+        'http': settings.SERVER_HTTP,
+        'proxy_headers': True,
+        'forwarded_allow_ips': settings.SERVER_FORWARDED_ALLOW_IPS,
+        'timeout_keep_alive': settings.SERVER_KEEP_ALIVE,
+        'timeout_graceful_shutdown': settings.SERVER_GRACEFUL_TIMEOUT,
+        'access_log': settings.SERVER_ACCESS_LOG,
+    }
+
+
+def main():
+    # The app is passed as an import string so the parent never imports
+    # it: workers are spawned fresh and each builds its own engine.
+    uvicorn.run('fast_zero.app:app', **get_server_options(get_settings()))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,7 @@
+import os
+from functools import cache
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,3 +14,80 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int
+
+    SERVER_HOST: str = '0.0.0.0'
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int | None = None
+    SERVER_LOOP: Literal['auto', 'asyncio', 'uvloop'] = 'uvloop'
+    SERVER_HTTP: Literal['auto', 'h11', 'httptools'] = 'httptools'
+    SERVER_FORWARDED_ALLOW_IPS: str = '127.0.0.1'
+    SERVER_KEEP_ALIVE: int = 5
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+    SERVER_ACCESS_LOG: bool = False
+
+    DATABASE_POOL_CLASS: Literal['queue', 'null'] = 'queue'
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30
+    DATABASE_POOL_RECYCLE: int = -1
+    DATABASE_POOL_PRE_PING: bool = False
+    DATABASE_STATEMENT_TIMEOUT: int = 0
+    DATABASE_PREPARED_STATEMENTS: bool = True
+    DATABASE_PREPARE_THRESHOLD: int = 5
+    DATABASE_REPLICA_URL: str | None = None
+    DATABASE_REPLICA_STICKY_SECONDS: float = 5
+
+    PASSWORD_HASH_EXECUTOR: Literal['thread', 'process'] = 'thread'
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+    PASSWORD_HASH_RETRY_AFTER: int = 1
+
+    CACHE_BACKEND: Literal['memory', 'redis'] = 'memory'
+    CACHE_REDIS_URL: str = 'redis://localhost:6379/0'
+
+    RATE_LIMIT_BACKEND: Literal['memory', 'redis'] = 'memory'
+    RATE_LIMIT_MAXSIZE: int = 100_000
+    RATE_LIMIT_CLIENT_IP_HEADER: str | None = None
+    RATE_LIMIT_LOGIN_IP: str | None = '30/minute'
+    RATE_LIMIT_LOGIN_USERNAME: str | None = '10/minute'
+    RATE_LIMIT_SIGNUP_IP: str | None = '10/minute'
+    RATE_LIMIT_USERS: str | None = None
+    RATE_LIMIT_TODOS: str | None = None
+
+    TOKEN_CACHE_MAXSIZE: int = 10_000
+    PRINCIPAL_CACHE_TTL: int = 60
+    PRINCIPAL_CACHE_MAXSIZE: int = 10_000
+    PRINCIPAL_CACHE_LOCAL_TTL: int = 2
+    USER_CACHE_TTL: int = 30
+    USER_CACHE_LOCAL_TTL: int = 2
+    USER_CACHE_MAXSIZE: int = 10_000
+
+    TODO_BULK_MAX_ITEMS: int = 500
+    TODO_EXPORT_BATCH_SIZE: int = 1000
+    TODO_CHANGES_SAFETY_LAG: float = 5
+    TODO_CHANGES_RETENTION_DAYS: int = 30
+    TODO_EVENTS_QUEUE_SIZE: int = 100
+    TODO_EVENTS_KEEPALIVE: float = 15
+
+    COMPRESSION_ENCODINGS: list[Literal['zstd', 'br', 'gzip']] = [
+        'zstd',
+        'br',
+        'gzip',
+    ]
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_MEDIA_TYPES: list[str] = [
+        'application/json',
+        'application/x-ndjson',
+        'text/csv',
+        'text/html',
+        'text/plain',
+    ]
+
+
+@cache
+def get_settings() -> Settings:
+    return Settings()
+
+
+def get_worker_count(settings: Settings) -> int:
+    return settings.SERVER_WORKERS or os.cpu_count() or 1
@@ -0,0 +1,38 @@
+"""Add full-text and trigram search indexes to todos
+
+Revision ID: 3c9e1f7a2b54
+Revises: 86a4fe8078cf
+Create Date: 2026-10-18 10:12:31.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9e1f7a2b54'
+down_revision: Union[str, None] = '86a4fe8078cf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.add_column('todos', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed("to_tsvector('simple', title || ' ' || description)", persisted=True), nullable=True))
+    # Built concurrently, outside the migration transaction, so writes to a
+    # large todos table are not blocked while the release command runs.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_todos_search_vector', 'todos', ['search_vector'], unique=False, postgresql_using='gin', postgresql_concurrently=True)
+        op.create_index('ix_todos_title_trgm', 'todos', ['title'], unique=False, postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}, postgresql_concurrently=True)
+        op.create_index('ix_todos_description_trgm', 'todos', ['description'], unique=False, postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'}, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_todos_description_trgm', table_name='todos', postgresql_concurrently=True)
+        op.drop_index('ix_todos_title_trgm', table_name='todos', postgresql_concurrently=True)
+        op.drop_index('ix_todos_search_vector', table_name='todos', postgresql_concurrently=True)
+    op.drop_column('todos', 'search_vector')
@@ -0,0 +1,32 @@
+"""Add todos access path indexes
+
+Revision ID: a41d6c2e9f07
+Revises: 3c9e1f7a2b54
+Create Date: 2026-10-18 11:02:47.918244
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41d6c2e9f07'
+down_revision: Union[str, None] = '3c9e1f7a2b54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Built concurrently, outside the migration transaction, so writes to a
+# large todos table are not blocked while the release command runs.
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_todos_user_id_created_at_id', 'todos', ['user_id', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_todos_user_id_state', 'todos', ['user_id', 'state'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_todos_user_id_state', table_name='todos', postgresql_concurrently=True)
+        op.drop_index('ix_todos_user_id_created_at_id', table_name='todos', postgresql_concurrently=True)
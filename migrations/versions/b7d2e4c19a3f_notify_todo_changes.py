@@ -0,0 +1,48 @@
+"""Notify todo changes
+
+Revision ID: b7d2e4c19a3f
+Revises: f3e99031ae56
+Create Date: 2026-10-18 18:21:09.204815
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e4c19a3f'
+down_revision: Union[str, None] = 'f3e99031ae56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+CREATE OR REPLACE FUNCTION notify_todo_change() RETURNS trigger AS $$
+DECLARE
+    todo todos;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        todo := OLD;
+    ELSE
+        todo := NEW;
+    END IF;
+    PERFORM pg_notify('todo_changes', json_build_object(
+        'op', lower(TG_OP), 'id', todo.id, 'user_id', todo.user_id
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+""")
+    op.execute(
+        'CREATE TRIGGER todos_notify_change '
+        'AFTER INSERT OR UPDATE OR DELETE ON todos '
+        'FOR EACH ROW EXECUTE FUNCTION notify_todo_change()'
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER todos_notify_change ON todos')
+    op.execute('DROP FUNCTION notify_todo_change()')
@@ -0,0 +1,82 @@
+"""Add todo state counters
+
+Revision ID: d5a8c3f1e702
+Revises: b7d2e4c19a3f
+Create Date: 2026-10-18 20:04:12.531288
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a8c3f1e702'
+down_revision: Union[str, None] = 'b7d2e4c19a3f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('todo_counts',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('state', postgresql.ENUM('draft', 'todo', 'doing', 'done', 'trash', name='todostate', create_type=False), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'state')
+    )
+    op.execute("""
+CREATE OR REPLACE FUNCTION count_todo_states() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO todo_counts AS counts (user_id, state, count)
+        SELECT user_id, state, count(*) FROM new_todos GROUP BY 1, 2
+        ON CONFLICT (user_id, state)
+        DO UPDATE SET count = counts.count + excluded.count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO todo_counts AS counts (user_id, state, count)
+        SELECT user_id, state, -count(*) FROM old_todos GROUP BY 1, 2
+        ON CONFLICT (user_id, state)
+        DO UPDATE SET count = counts.count + excluded.count;
+    ELSE
+        -- Updates that keep the state net to zero and touch no counter.
+        INSERT INTO todo_counts AS counts (user_id, state, count)
+        SELECT user_id, state, sum(delta) FROM (
+            SELECT user_id, state, 1 AS delta FROM new_todos
+            UNION ALL
+            SELECT user_id, state, -1 FROM old_todos
+        ) AS deltas
+        GROUP BY 1, 2 HAVING sum(delta) <> 0
+        ON CONFLICT (user_id, state)
+        DO UPDATE SET count = counts.count + excluded.count;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+""")
+    # Block writes until the backfill commits, so no change is counted
+    # twice or missed.
+    op.execute('LOCK TABLE todos IN SHARE MODE')
+    for operation, transition in (
+        ('insert', 'NEW TABLE AS new_todos'),
+        ('update', 'OLD TABLE AS old_todos NEW TABLE AS new_todos'),
+        ('delete', 'OLD TABLE AS old_todos'),
+    ):
+        op.execute(
+            f'CREATE TRIGGER todos_count_{operation} '
+            f'AFTER {operation.upper()} ON todos REFERENCING {transition} '
+            'FOR EACH STATEMENT EXECUTE FUNCTION count_todo_states()'
+        )
+    op.execute(
+        'INSERT INTO todo_counts (user_id, state, count) '
+        'SELECT user_id, state, count(*) FROM todos GROUP BY 1, 2'
+    )
+
+
+def downgrade() -> None:
+    for operation in ('insert', 'update', 'delete'):
+        op.execute(f'DROP TRIGGER todos_count_{operation} ON todos')
+    op.execute('DROP FUNCTION count_todo_states()')
+    op.drop_table('todo_counts')
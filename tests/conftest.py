@@ -1,33 +1,31 @@
-import factory
+from contextlib import contextmanager
+
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     create_async_engine,
 )
 from testcontainers.postgres import PostgresContainer
 
-from fast_zero import security
+from fast_zero import ratelimit, security
 from fast_zero.app import app
-from fast_zero.database import get_session
-from fast_zero.models import User, table_registry
-
-
-class UserFactory(factory.Factory):
-    class Meta:
-        model = User
-
-    username = factory.Sequence(lambda n: f'test{n}')
-    email = factory.LazyAttribute(lambda obj: f'{obj.username}@email.com')
-    password = factory.LazyAttribute(
-        lambda obj: security.get_password_hash(f'{obj.username}-passwd')
-    )
+from fast_zero.database import (
+    get_read_session,
+    get_session,
+    instrument_engine,
+)
+from fast_zero.models import table_registry
+from fast_zero.routes import users
+from tests.factories import UserFactory
 
 
 @pytest.fixture(scope='session')
 async def engine():
     with PostgresContainer('postgres:16-alpine', driver='psycopg') as postgres:
         engine = create_async_engine(postgres.get_connection_url())
+        instrument_engine(engine)
         yield engine
 
 
@@ -43,6 +41,44 @@ async def session(engine):
         await conn.run_sync(table_registry.metadata.drop_all)
 
 
+@pytest.fixture()
+def queries(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, *args):
+        statements.append((statement, parameters))
+
+    event.listen(
+        engine.sync_engine, 'before_cursor_execute', before_cursor_execute
+    )
+    yield statements
+    event.remove(
+        engine.sync_engine, 'before_cursor_execute', before_cursor_execute
+    )
+
+
+@pytest.fixture()
+def assert_num_queries(queries):
+    @contextmanager
+    def assert_num_queries(expected: int):
+        queries.clear()
+        yield
+        statements = [statement for statement, _ in queries]
+        assert len(statements) == expected, statements
+
+    return assert_num_queries
+
+
+@pytest.fixture(autouse=True)
+async def clear_caches():
+    yield
+    security.token_cache.clear()
+    await security.principal_cache.clear()
+    await ratelimit.clear()
+    await users.invalidate_users()
+    await users.user_cache.clear()
+
+
 @pytest.fixture()
 def client(session):
     def get_session_override():
@@ -50,6 +86,7 @@ def client(session):
 
     with TestClient(app) as client:
         app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_read_session] = get_session_override
         yield client
 
     app.dependency_overrides.clear()
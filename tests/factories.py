@@ -0,0 +1,26 @@
+import factory
+import factory.fuzzy
+
+from fast_zero import security
+from fast_zero.models import Todo, TodoState, User
+
+
+class UserFactory(factory.Factory):
+    class Meta:
+        model = User
+
+    username = factory.Sequence(lambda n: f'test{n}')
+    email = factory.LazyAttribute(lambda obj: f'{obj.username}@email.com')
+    password = factory.LazyAttribute(
+        lambda obj: security.get_password_hash(f'{obj.username}-passwd')
+    )
+
+
+class TodoFactory(factory.Factory):
+    class Meta:
+        model = Todo
+
+    title = factory.Faker('text')
+    description = factory.Faker('text')
+    state = factory.fuzzy.FuzzyChoice(TodoState)
+    user_id = 1
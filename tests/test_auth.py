@@ -1,4 +1,6 @@
 from http import HTTPStatus
+from threading import BoundedSemaphore
+from unittest.mock import patch
 
 from freezegun import freeze_time
 
@@ -114,3 +116,19 @@ def test_should_not_refresh_expired_token(client, user):
 
         assert response.status_code == HTTPStatus.UNAUTHORIZED
         assert response.json()['detail'] == 'Could not validate credentials'
+
+
+def test_should_return_service_unavailable_when_hash_pool_is_full(
+    client, user
+):
+    with patch(
+        'fast_zero.security._password_hash_slots', BoundedSemaphore(1)
+    ) as slots:
+        slots.acquire()
+        response = client.post(
+            '/auth/token',
+            data={'username': user.email, 'password': user.clean_password},
+        )
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.headers['Retry-After'] == '1'
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+from freezegun import freeze_time
+
+from fast_zero.cache import (
+    LoadingCache,
+    LRUCache,
+    MemoryBackend,
+    cache_requests,
+)
+
+
+def test_lru_cache_should_evict_least_recently_used():
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.get('c') == 3  # noqa: PLR2004
+    assert len(cache) == 2  # noqa: PLR2004
+
+
+def test_lru_cache_should_expire_entries():
+    with freeze_time('2000-01-01 00:00:00') as frozen_time:
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2, ttl=120)
+
+        frozen_time.tick(61)
+
+        assert cache.get('a') is None
+        assert cache.get('b') == 2  # noqa: PLR2004
+        assert len(cache) == 1
+
+
+async def test_memory_backend_should_store_and_delete_values():
+    cache = MemoryBackend('test', maxsize=10, ttl=60)
+    await cache.set('a', {'id': 1})
+
+    assert await cache.get('a') == {'id': 1}
+
+    await cache.delete('a')
+
+    assert await cache.get('a') is None
+
+
+async def test_loading_cache_should_coalesce_concurrent_misses():
+    cache = LoadingCache(MemoryBackend('coalesce', maxsize=10, ttl=60))
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return {'id': 1}
+
+    results = await asyncio.gather(
+        *(cache.get_or_load('a', load) for _ in range(5))
+    )
+
+    assert results == [{'id': 1}] * 5
+    assert len(loads) == 1
+    assert await cache.get_or_load('a', load) == {'id': 1}
+    assert len(loads) == 1
+    coalesced = cache_requests.get(namespace='coalesce', result='coalesced')
+    assert coalesced == 4  # noqa: PLR2004
+    assert cache_requests.get(namespace='coalesce', result='hit') == 1
+
+
+async def test_loading_cache_should_retry_after_failed_load():
+    cache = LoadingCache(MemoryBackend('retry', maxsize=10, ttl=60))
+
+    async def failing_load():
+        await asyncio.sleep(0.01)
+        raise RuntimeError
+
+    async def load():
+        return {'id': 1}
+
+    first = asyncio.create_task(cache.get_or_load('a', failing_load))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(cache.get_or_load('a', load))
+
+    with pytest.raises(RuntimeError):
+        await first
+
+    assert await second == {'id': 1}
+    assert await cache.backend.get('a') == {'id': 1}
+
+
+async def test_loading_cache_should_not_store_missing_values():
+    cache = LoadingCache(MemoryBackend('missing', maxsize=10, ttl=60))
+
+    async def load():
+        return None
+
+    assert await cache.get_or_load('a', load) is None
+    assert await cache.backend.get('a') is None
+
+
+async def test_loading_cache_should_not_store_loads_racing_invalidation():
+    cache = LoadingCache(MemoryBackend('racing', maxsize=10, ttl=60))
+
+    async def load():
+        await cache.delete('a')
+        return {'id': 1}
+
+    assert await cache.get_or_load('a', load) == {'id': 1}
+    assert await cache.backend.get('a') is None
@@ -0,0 +1,125 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from fast_zero.app import html_content
+from fast_zero.compression import CompressionMiddleware, choose_encoding
+
+LARGE = {'data': 'x' * 1000}
+
+app = FastAPI()
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=100,
+    media_types=['application/json'],
+    encodings=['zstd', 'br', 'gzip'],
+)
+
+
+@app.get('/large')
+def large():
+    return LARGE
+
+
+@app.get('/small')
+def small():
+    return {'data': 'x'}
+
+
+@app.get('/stream')
+def stream():
+    return StreamingResponse(
+        iter(['a' * 200, 'b' * 200]), media_type='application/json'
+    )
+
+
+@app.get('/events')
+def events():
+    return StreamingResponse(
+        iter(['data: x\n\n' * 100]), media_type='text/event-stream'
+    )
+
+
+@pytest.mark.parametrize(
+    ('accept_encoding', 'expected'),
+    [
+        ('gzip', 'gzip'),
+        ('gzip;q=0.5, br', 'br'),
+        ('br;q=0, gzip', 'gzip'),
+        ('gzip, br, zstd', 'zstd'),
+        ('*', 'zstd'),
+        ('identity', None),
+        ('', None),
+        ('gzip;q=invalid', None),
+    ],
+)
+def test_should_choose_encoding(accept_encoding, expected):
+    assert choose_encoding(accept_encoding, ['zstd', 'br', 'gzip']) == expected
+
+
+def test_should_compress_large_responses():
+    client = TestClient(app)
+
+    response = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert int(response.headers['Content-Length']) < len(response.content)
+    assert response.json() == LARGE
+
+
+def test_should_compress_with_zstd():
+    zstandard = pytest.importorskip('zstandard')
+    client = TestClient(app)
+
+    with client.stream(
+        'GET', '/large', headers={'Accept-Encoding': 'zstd'}
+    ) as response:
+        raw = response.read()
+
+    assert response.headers['Content-Encoding'] == 'zstd'
+    assert zstandard.ZstdDecompressor().decompressobj().decompress(raw) == (
+        b'{"data":"' + b'x' * 1000 + b'"}'
+    )
+
+
+def test_should_not_compress_below_minimum_size():
+    client = TestClient(app)
+
+    response = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in response.headers
+    assert response.json() == {'data': 'x'}
+
+
+def test_should_compress_streaming_responses():
+    client = TestClient(app)
+
+    response = client.get('/stream', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert response.text == 'a' * 200 + 'b' * 200
+
+
+def test_should_not_compress_media_types_outside_allowlist():
+    client = TestClient(app)
+
+    response = client.get('/events', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_should_serve_precompressed_html(client):
+    response = client.get('/hello_text', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.text == html_content
+
+    response = client.get(
+        '/hello_text', headers={'Accept-Encoding': 'identity'}
+    )
+
+    assert 'Content-Encoding' not in response.headers
+    assert response.content == html_content.encode()
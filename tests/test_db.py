@@ -1,6 +1,23 @@
-from sqlalchemy import select
+from types import SimpleNamespace
 
-from fast_zero.models import User
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from fast_zero.app import app
+from fast_zero.database import (
+    Database,
+    get_engine_options,
+    get_read_session,
+    get_session,
+    measured_pools,
+    pool_wait,
+)
+from fast_zero.models import User, table_registry
+from fast_zero.settings import Settings, get_settings
 
 
 async def test_create_user(session):
@@ -11,3 +28,109 @@ async def test_create_user(session):
     user = await session.scalar(select(User).where(User.username == 'Alice'))
 
     assert user.username == new_user.username
+
+
+async def test_create_all_should_be_rerunnable(session, engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+
+
+def test_engine_options_should_use_null_pool_without_prepared_statements():
+    options = get_engine_options(
+        Settings(
+            DATABASE_POOL_CLASS='null', DATABASE_PREPARED_STATEMENTS=False
+        )
+    )
+
+    assert options == {
+        'poolclass': NullPool,
+        'connect_args': {'prepare_threshold': None},
+    }
+
+
+async def test_measured_pool_should_apply_settings_and_record_wait(engine):
+    options = get_engine_options(
+        Settings(DATABASE_POOL_SIZE=1, DATABASE_STATEMENT_TIMEOUT=1500)
+    )
+    tuned_engine = create_async_engine(engine.url, **options)
+    checkouts = pool_wait.count()
+
+    async with tuned_engine.connect() as conn:
+        timeout = await conn.scalar(text('SHOW statement_timeout'))
+        checked_out = tuned_engine.pool.checkedout()
+
+    await tuned_engine.dispose()
+
+    assert timeout == '1500ms'
+    assert checked_out == 1
+    assert tuned_engine.pool.size() == 1
+    assert pool_wait.count() == checkouts + 1
+
+
+def _request(database: Database, method: str) -> Request:
+    return Request({
+        'type': 'http',
+        'method': method,
+        'headers': [(b'authorization', b'Bearer sticky-token')],
+        'client': ('127.0.0.1', 1234),
+        'app': SimpleNamespace(state=SimpleNamespace(database=database)),
+    })
+
+
+@pytest.fixture()
+async def database(engine):
+    database = Database(get_settings())
+    database.replica_engine = engine
+    yield database
+    await database.dispose()
+
+
+async def test_read_session_should_route_to_replica(database, engine):
+    async for session in get_read_session(_request(database, 'GET')):
+        assert session.bind is engine
+
+
+async def test_read_session_should_stick_to_primary_after_write(database):
+    async for session in get_session(_request(database, 'POST')):
+        assert session.bind is database.engine
+
+    async for session in get_read_session(_request(database, 'GET')):
+        assert session.bind is database.engine
+
+
+async def test_database_should_measure_primary_and_replica_pools():
+    database = Database(
+        Settings(
+            DATABASE_REPLICA_URL=get_settings().DATABASE_URL, SERVER_WORKERS=1
+        )
+    )
+    pools = [database.engine.pool, database.replica_engine.pool]
+
+    assert all(pool in measured_pools for pool in pools)
+
+    await database.dispose()
+
+    assert not any(pool in measured_pools for pool in pools)
+
+
+def test_database_should_require_shared_marks_for_replica_workers():
+    with pytest.raises(RuntimeError):
+        Database(
+            Settings(
+                DATABASE_REPLICA_URL=get_settings().DATABASE_URL,
+                SERVER_WORKERS=2,
+                CACHE_BACKEND='memory',
+            )
+        )
+
+
+def test_get_settings_should_be_cached():
+    assert get_settings() is get_settings()
+
+
+def test_lifespan_should_create_and_dispose_database():
+    with TestClient(app):
+        pool = app.state.database.engine.pool
+        assert pool in measured_pools
+
+    assert pool not in measured_pools
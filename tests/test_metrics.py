@@ -0,0 +1,77 @@
+from http import HTTPStatus
+
+from fast_zero import metrics
+
+
+def test_histogram_should_render_cumulative_buckets():
+    histogram = metrics.Histogram('test_seconds', 'Test.', buckets=(0.1, 1))
+    histogram.observe(0.05, route='/a')
+    histogram.observe(0.5, route='/a')
+    histogram.observe(5, route='/a')
+
+    lines = list(histogram.collect())
+    metrics.registry.remove(histogram)
+
+    assert lines == [
+        'test_seconds_bucket{route="/a",le="0.1"} 1',
+        'test_seconds_bucket{route="/a",le="1"} 2',
+        'test_seconds_bucket{route="/a",le="+Inf"} 3',
+        'test_seconds_sum{route="/a"} 5.55',
+        'test_seconds_count{route="/a"} 3',
+    ]
+
+
+def test_counter_should_sum_increments():
+    counter = metrics.Counter('test_total', 'Test.')
+    counter.inc()
+    counter.inc(2)
+
+    lines = list(counter.collect())
+    metrics.registry.remove(counter)
+
+    assert counter.get() == 3  # noqa: PLR2004
+    assert lines == ['test_total 3']
+
+
+def test_gauge_should_render_current_value():
+    gauge = metrics.Gauge('test_gauge', 'Test.', lambda: 7)
+
+    lines = list(gauge.collect())
+    metrics.registry.remove(gauge)
+
+    assert lines == ['test_gauge 7']
+
+
+def test_should_expose_metrics(client):
+    response = client.get('/metrics')
+
+    assert response.status_code == HTTPStatus.OK
+    assert '# TYPE password_hash_duration_seconds histogram' in response.text
+
+
+def test_should_report_server_timing(client, user, token):
+    response = client.get(
+        '/todos/', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    db, pool, app, total = response.headers['Server-Timing'].split(', ')
+    assert db.startswith('db;dur=')
+    assert db.endswith(';desc="3 queries"')
+    assert pool.startswith('pool;dur=')
+    assert app.startswith('app;dur=')
+    assert total.startswith('total;dur=')
+
+
+def test_should_expose_per_route_histograms(client, user, token):
+    client.get(f'/users/{user.id}')
+
+    response = client.get('/metrics')
+
+    assert (
+        'http_request_db_queries_bucket'
+        '{method="GET",route="/users/{user_id}",le="1"}'
+    ) in response.text
+    assert (
+        'http_request_duration_seconds_count'
+        '{method="GET",route="/users/{user_id}"}'
+    ) in response.text
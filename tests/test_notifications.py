@@ -0,0 +1,80 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+from fast_zero.notifications import RESYNC, TodoChangeHub
+from tests.factories import TodoFactory
+
+
+def make_hub(queue_size: int = 10):
+    return TodoChangeHub(
+        'postgresql+psycopg://localhost/fast_zero', queue_size
+    )
+
+
+async def test_hub_should_fan_out_events_to_the_user_subscribers():
+    hub = make_hub()
+    first, second = hub.subscribe(1), hub.subscribe(1)
+    other = hub.subscribe(2)
+    event = {'op': 'insert', 'id': 1, 'user_id': 1}
+
+    hub.publish(event)
+
+    assert first.get_nowait() == event
+    assert second.get_nowait() == event
+    assert other.empty()
+
+
+async def test_hub_should_ask_slow_subscribers_to_resync():
+    hub = make_hub(queue_size=2)
+    queue = hub.subscribe(1)
+
+    for todo_id in range(3):
+        hub.publish({'op': 'update', 'id': todo_id, 'user_id': 1})
+
+    assert queue.get_nowait() == RESYNC
+    assert queue.empty()
+
+
+async def test_hub_should_stream_server_sent_events():
+    hub = make_hub()
+    stream = hub.stream(1, keepalive=0.01)
+
+    assert await anext(stream) == ': keepalive\n\n'
+
+    event = {'op': 'delete', 'id': 3, 'user_id': 1}
+    hub.publish(event)
+
+    assert await anext(stream) == (
+        f'event: delete\ndata: {json.dumps(event)}\n\n'
+    )
+
+    await stream.aclose()
+
+    assert hub.subscribers == {}
+
+
+async def test_hub_should_receive_notifications_for_todo_writes(
+    engine, session, user
+):
+    hub = TodoChangeHub(
+        engine.url.render_as_string(hide_password=False), queue_size=10
+    )
+    await hub.start()
+    await asyncio.wait_for(hub.listening.wait(), timeout=5)
+    queue = hub.subscribe(user.id)
+
+    todo = TodoFactory(user_id=user.id)
+    session.add(todo)
+    await session.commit()
+
+    event = await asyncio.wait_for(queue.get(), timeout=5)
+    await hub.close()
+
+    assert event == {'op': 'insert', 'id': todo.id, 'user_id': user.id}
+
+
+def test_todo_events_should_require_authentication(client):
+    response = client.get('/todos/events')
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
@@ -0,0 +1,70 @@
+import pytest
+
+from tests.factories import TodoFactory
+
+ROUTES = [
+    ('GET', '/todos/', None),
+    ('GET', '/todos/?state=done', None),
+    ('GET', '/todos/?title=sbrou', None),
+    ('GET', '/todos/?description=sbrou', None),
+    ('GET', '/todos/?q=sbroubous', None),
+    (
+        'GET',
+        '/todos/?limit=2&cursor=WyIyMDAwLTAxLTAxVDAwOjAwOjAwIiwgMV0',
+        None,
+    ),
+    ('GET', '/todos/changes', None),
+    (
+        'GET',
+        '/todos/changes?since=WyIyMDAwLTAxLTAxVDAwOjAwOjAwIiwgMCwgMV0',
+        None,
+    ),
+    ('PATCH', '/todos/1', {'title': 'sbroubous'}),
+    ('DELETE', '/todos/2', None),
+    ('PATCH', '/todos/bulk', [{'id': 1, 'title': 'sbroubous'}]),
+    ('DELETE', '/todos/bulk', [1, 2]),
+    ('GET', '/users/?limit=2&cursor=WzFd', None),
+    ('GET', '/users/1', None),
+    ('GET', '/todos/stats', None),
+]
+AUDITED_STATEMENTS = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+
+
+def _seq_scans(plan: dict):
+    if plan['Node Type'] == 'Seq Scan':
+        yield plan['Relation Name']
+
+    for child in plan.get('Plans', []):
+        yield from _seq_scans(child)
+
+
+@pytest.mark.parametrize(('method', 'url', 'json'), ROUTES)
+async def test_route_queries_should_not_use_sequential_scans(  # noqa: PLR0913, PLR0917
+    session, client, user, token, queries, method, url, json
+):
+    session.add_all(TodoFactory.create_batch(50, user_id=user.id))
+    await session.commit()
+    queries.clear()
+
+    client.request(
+        method, url, headers={'Authorization': f'Bearer {token}'}, json=json
+    )
+
+    statements = [
+        (statement, parameters)
+        for statement, parameters in queries
+        if statement.lstrip().startswith(AUDITED_STATEMENTS)
+    ]
+    assert statements
+
+    connection = await session.connection()
+    await connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+    for statement, parameters in statements:
+        result = await connection.exec_driver_sql(
+            f'EXPLAIN (FORMAT JSON) {statement}', parameters
+        )
+        plan = result.scalar()[0]['Plan']
+
+        assert list(_seq_scans(plan)) == [], statement
+
+    await session.rollback()
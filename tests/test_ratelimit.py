@@ -0,0 +1,128 @@
+import asyncio
+from http import HTTPStatus
+
+from fastapi import Request
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+
+from fast_zero import ratelimit, security
+from fast_zero.ratelimit import MemoryBucketStore, client_ip, parse_rate
+from fast_zero.routes import auth, users
+from fast_zero.server import get_server_options
+from fast_zero.settings import Settings
+
+
+async def _client_ip_behind_proxy(headers: list) -> str:
+    keys = []
+
+    async def app(scope, receive, send):
+        keys.append(await client_ip(Request(scope)))
+
+    options = get_server_options(Settings())
+    await ProxyHeadersMiddleware(app, options['forwarded_allow_ips'])(
+        {
+            'type': 'http',
+            'scheme': 'http',
+            'client': ('203.0.113.9', 4321),
+            'headers': headers,
+        },
+        None,
+        None,
+    )
+    return keys[0]
+
+
+def test_should_parse_rate():
+    assert parse_rate('10/minute') == (10, 60)
+
+
+async def test_bucket_should_reject_when_empty_and_refill():
+    store = MemoryBucketStore('test', capacity=2, period=0.05)
+
+    assert await store.hit('key') == 0
+    assert await store.hit('key') == 0
+    assert await store.hit('key') > 0
+    assert await store.hit('other') == 0
+
+    await asyncio.sleep(0.05)
+
+    assert await store.hit('key') == 0
+
+
+def test_login_should_be_throttled_by_username_before_hashing(
+    client, user, monkeypatch
+):
+    monkeypatch.setattr(
+        auth.login_username_limit, 'store', MemoryBucketStore('test', 1, 60)
+    )
+    verifications = []
+    verify_password_async = security.verify_password_async
+
+    async def counting_verify(*args):
+        verifications.append(args)
+        return await verify_password_async(*args)
+
+    monkeypatch.setattr(security, 'verify_password_async', counting_verify)
+    data = {'username': user.email, 'password': 'wrong'}
+
+    first = client.post('/auth/token', data=data)
+    second = client.post('/auth/token', data=data)
+
+    assert first.status_code == HTTPStatus.BAD_REQUEST
+    assert second.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert second.json() == {'detail': 'Too many requests'}
+    assert int(second.headers['Retry-After']) > 0
+    assert len(verifications) == 1
+
+
+def test_save_user_should_be_throttled_by_ip(client, monkeypatch):
+    monkeypatch.setattr(
+        users.signup_limit, 'store', MemoryBucketStore('test', 1, 60)
+    )
+
+    responses = [
+        client.post(
+            '/users/',
+            json={
+                'username': f'user{n}',
+                'email': f'user{n}@example.com',
+                'password': 'secret',
+            },
+        )
+        for n in range(2)
+    ]
+
+    assert responses[0].status_code == HTTPStatus.CREATED
+    assert responses[1].status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+
+async def test_client_ip_should_ignore_spoofed_forwarded_for():
+    assert (
+        await _client_ip_behind_proxy([(b'x-forwarded-for', b'6.6.6.6')])
+        == '203.0.113.9'
+    )
+
+
+async def test_client_ip_should_use_configured_edge_header(monkeypatch):
+    monkeypatch.setattr(
+        ratelimit,
+        'get_settings',
+        lambda: Settings(RATE_LIMIT_CLIENT_IP_HEADER='Fly-Client-IP'),
+    )
+
+    assert (
+        await _client_ip_behind_proxy([
+            (b'x-forwarded-for', b'6.6.6.6'),
+            (b'fly-client-ip', b'198.51.100.7'),
+        ])
+        == '198.51.100.7'
+    )
+
+
+async def test_client_ip_should_fall_back_without_edge_header(monkeypatch):
+    monkeypatch.setattr(
+        ratelimit,
+        'get_settings',
+        lambda: Settings(RATE_LIMIT_CLIENT_IP_HEADER='Fly-Client-IP'),
+    )
+
+    assert await _client_ip_behind_proxy([]) == '203.0.113.9'
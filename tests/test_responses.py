@@ -0,0 +1,26 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from fast_zero.responses import ModelResponse
+from fast_zero.schemas import UserList
+from tests.factories import UserFactory
+
+
+def test_model_response_should_render_from_attributes():
+    user = UserFactory()
+    user.id = 1
+
+    response = ModelResponse(UserList, {'users': [user], 'next_cursor': None})
+
+    assert response.media_type == 'application/json'
+    assert json.loads(response.body) == {
+        'users': [{'id': 1, 'username': user.username, 'email': user.email}],
+        'next_cursor': None,
+    }
+
+
+def test_model_response_should_validate_content():
+    with pytest.raises(ValidationError):
+        ModelResponse(UserList, {'users': [{'id': 'one'}]})
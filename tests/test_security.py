@@ -1,6 +1,13 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from http import HTTPStatus
+from threading import BoundedSemaphore
 from unittest.mock import patch
 
-from jwt import decode
+import pytest
+from fastapi import HTTPException
+from freezegun import freeze_time
+from jwt import ExpiredSignatureError, decode
 
 from fast_zero import security
 from fast_zero.settings import Settings
@@ -40,3 +47,98 @@ def test_create_access_token_should_generate_valid_jwt():
 
     assert result['sub'] == data['sub']
     assert 'exp' in result.keys()
+
+
+async def test_get_password_hash_async_should_run_on_executor():
+    with patch('fast_zero.security.pwd_context') as _pwd_context:
+        _pwd_context.hash.return_value = 'hashed_passwd'
+        result = await security.get_password_hash_async('passwd')
+
+        assert result == 'hashed_passwd'
+        _pwd_context.hash.assert_called_once_with('passwd')
+
+
+async def test_verify_password_async_should_record_timing():
+    calls = security.password_hash_duration.count(operation='verify')
+    with patch('fast_zero.security.pwd_context') as _pwd_context:
+        _pwd_context.verify.return_value = True
+        result = await security.verify_password_async('passwd', 'hashed')
+
+        assert result
+        _pwd_context.verify.assert_called_once_with('passwd', 'hashed')
+
+    assert security.password_hash_duration.count(operation='verify') == (
+        calls + 1
+    )
+
+
+async def test_password_job_should_raise_service_unavailable_when_full():
+    with patch(
+        'fast_zero.security._password_hash_slots', BoundedSemaphore(1)
+    ) as slots:
+        slots.acquire()
+
+        with pytest.raises(HTTPException) as exc_info:
+            await security.get_password_hash_async('passwd')
+
+    assert exc_info.value.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert exc_info.value.headers == {
+        'Retry-After': str(settings.PASSWORD_HASH_RETRY_AFTER)
+    }
+
+
+def test_get_password_hash_executor_should_use_process_pool():
+    security.get_password_hash_executor.cache_clear()
+    with patch.object(security.settings, 'PASSWORD_HASH_EXECUTOR', 'process'):
+        executor = security.get_password_hash_executor()
+
+    security.get_password_hash_executor.cache_clear()
+    executor.shutdown()
+
+    assert isinstance(executor, ProcessPoolExecutor)
+
+
+def test_decode_access_token_should_reuse_verified_claims():
+    token = security.create_access_token({'sub': 'cached@test.com'})
+    hits = security.token_cache_requests.get(result='hit')
+
+    with patch('fast_zero.security.decode', wraps=decode) as _decode:
+        first = security.decode_access_token(token)
+        second = security.decode_access_token(token)
+
+    assert first == second
+    _decode.assert_called_once()
+    assert security.token_cache_requests.get(result='hit') == hits + 1
+
+
+def test_decode_access_token_should_not_reuse_claims_after_exp():
+    with freeze_time('2000-01-01 00:00:00') as frozen_time:
+        token = security.create_access_token({'sub': 'cached@test.com'})
+        security.decode_access_token(token)
+
+        frozen_time.tick(
+            timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES + 1)
+        )
+
+        with pytest.raises(ExpiredSignatureError):
+            security.decode_access_token(token)
+
+
+@pytest.mark.parametrize(
+    ('backend', 'workers', 'ttl'),
+    [('memory', 1, 60), ('memory', 4, 2), ('redis', 4, 60)],
+)
+def test_principal_cache_ttl_should_be_short_for_local_multi_worker_caches(
+    backend, workers, ttl
+):
+    assert (
+        security.get_principal_cache_ttl(
+            Settings(
+                CACHE_BACKEND=backend,
+                SERVER_WORKERS=workers,
+                PRINCIPAL_CACHE_TTL=60,
+                PRINCIPAL_CACHE_LOCAL_TTL=2,
+            )
+        )
+        == ttl
+    )
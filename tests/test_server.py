@@ -0,0 +1,32 @@
+from fast_zero import server
+from fast_zero.settings import Settings
+
+
+def test_server_options_should_come_from_settings():
+    options = server.get_server_options(
+        Settings(SERVER_WORKERS=3, SERVER_PORT=9000)
+    )
+
+    assert options['workers'] == 3  # noqa: PLR2004
+    assert options['port'] == 9000  # noqa: PLR2004
+    assert options['loop'] == 'uvloop'
+    assert options['http'] == 'httptools'
+
+
+def test_server_should_default_to_one_worker_per_cpu(monkeypatch):
+    monkeypatch.setattr('os.cpu_count', lambda: 4)
+
+    options = server.get_server_options(Settings(SERVER_WORKERS=None))
+
+    assert options['workers'] == 4  # noqa: PLR2004
+
+
+def test_main_should_run_the_app_by_import_string(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        server.uvicorn, 'run', lambda *args, **kwargs: calls.append(args)
+    )
+
+    server.main()
+
+    assert calls == [('fast_zero.app:app',)]
@@ -1,20 +1,19 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
 from http import HTTPStatus
+from unittest.mock import patch
 
-import factory
-import factory.fuzzy
+import pytest
 from freezegun import freeze_time
+from sqlalchemy import func, select, update
 
-from fast_zero.models import Todo, TodoState
-
-
-class TodoFactory(factory.Factory):
-    class Meta:
-        model = Todo
-
-    title = factory.Faker('text')
-    description = factory.Faker('text')
-    state = factory.fuzzy.FuzzyChoice(TodoState)
-    user_id = 1
+from fast_zero.models import Todo, TodoDeletion, TodoState
+from fast_zero.pagination import encode_cursor
+from fast_zero.routes import todos as todos_routes
+from fast_zero.schemas import TodoPublic
+from tests.factories import TodoFactory
 
 
 def test_should_save_todo(client, token):
@@ -210,3 +209,519 @@ def test_patch_should_return_notfound(client, token):
 
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert response.json() == {'detail': 'Task not found'}
+
+
+async def test_should_paginate_todos_with_cursor(session, client, user, token):
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id))
+    await session.commit()
+
+    seen = []
+    cursor = ''
+    for _ in range(3):
+        response = client.get(
+            f'/todos/?limit=2&cursor={cursor}',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        assert response.status_code == HTTPStatus.OK
+
+        seen.extend(todo['id'] for todo in response.json()['todos'])
+        cursor = response.json()['next_cursor']
+
+    assert seen == [1, 2, 3, 4, 5]
+    assert cursor is None
+
+
+def test_list_todos_should_return_bad_request_for_invalid_cursor(
+    client, token
+):
+    response = client.get(
+        '/todos/?cursor=W10',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
+
+
+async def test_should_search_todos_by_text(session, client, user, token):
+    todos = TodoFactory.create_batch(
+        5, user_id=user.id, title='other', description='other'
+    )
+    todos[0].title = 'buy milk'
+    todos[0].description = 'and some bread'
+    todos[1].title = 'milk the cow'
+    todos[1].description = 'milk milk'
+
+    session.add_all(todos)
+    await session.commit()
+
+    response = client.get(
+        '/todos/?q=milk', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [todo['title'] for todo in response.json()['todos']] == [
+        'milk the cow',
+        'buy milk',
+    ]
+
+
+def test_search_should_not_accept_cursor(client, token):
+    response = client.get(
+        '/todos/?q=milk&cursor=W10',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {
+        'detail': 'Cursor pagination is not supported with q'
+    }
+
+
+def test_should_create_todos_in_bulk(client, token, assert_num_queries):
+    client.get('/todos/', headers={'Authorization': f'Bearer {token}'})
+
+    with assert_num_queries(1):
+        response = client.post(
+            '/todos/bulk',
+            headers={'Authorization': f'Bearer {token}'},
+            json=[
+                {'title': f'todo {i}', 'description': 'bulk', 'state': 'todo'}
+                for i in range(3)
+            ],
+        )
+
+    assert response.status_code == HTTPStatus.CREATED
+    results = response.json()['results']
+    assert [result['id'] for result in results] == [1, 2, 3]
+    assert [result['status'] for result in results] == [HTTPStatus.CREATED] * 3
+    assert [result['todo']['title'] for result in results] == [
+        'todo 0',
+        'todo 1',
+        'todo 2',
+    ]
+
+
+async def test_should_patch_todos_in_bulk(session, client, user, token):
+    todos = TodoFactory.create_batch(2, user_id=user.id, state=TodoState.todo)
+    session.add_all(todos)
+    await session.commit()
+
+    response = client.patch(
+        '/todos/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[
+            {'id': todos[0].id, 'title': 'updated'},
+            {'id': todos[1].id, 'state': 'done'},
+            {'id': 999, 'title': 'missing'},
+        ],
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    first, second, missing = response.json()['results']
+    assert first['todo']['title'] == 'updated'
+    assert first['todo']['state'] == TodoState.todo
+    assert second['todo']['title'] == todos[1].title
+    assert second['todo']['state'] == TodoState.done
+    assert missing == {'id': 999, 'status': HTTPStatus.NOT_FOUND, 'todo': None}
+
+
+async def test_should_delete_todos_in_bulk(
+    session, client, user, other_user, token
+):
+    todos = TodoFactory.create_batch(2, user_id=user.id)
+    others_todo = TodoFactory(user_id=other_user.id)
+    session.add_all([*todos, others_todo])
+    await session.commit()
+
+    response = client.request(
+        'DELETE',
+        '/todos/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[todos[0].id, todos[1].id, others_todo.id],
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [result['status'] for result in response.json()['results']] == [
+        HTTPStatus.OK,
+        HTTPStatus.OK,
+        HTTPStatus.NOT_FOUND,
+    ]
+
+
+def test_bulk_should_reject_empty_batches(client, token):
+    response = client.post(
+        '/todos/bulk', headers={'Authorization': f'Bearer {token}'}, json=[]
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_create_todo_should_issue_a_single_query(
+    client, token, assert_num_queries
+):
+    client.get('/todos/', headers={'Authorization': f'Bearer {token}'})
+
+    with assert_num_queries(1):
+        response = client.post(
+            '/todos/',
+            headers={'Authorization': f'Bearer {token}'},
+            json={'title': 'one', 'description': 'query', 'state': 'todo'},
+        )
+
+    assert response.status_code == HTTPStatus.CREATED
+
+
+async def test_patch_todo_should_issue_a_single_query(
+    session, client, user, token, assert_num_queries
+):
+    todo = TodoFactory(user_id=user.id)
+    session.add(todo)
+    await session.commit()
+    client.get('/todos/', headers={'Authorization': f'Bearer {token}'})
+
+    with assert_num_queries(1):
+        response = client.patch(
+            f'/todos/{todo.id}',
+            headers={'Authorization': f'Bearer {token}'},
+            json={'title': 'one query'},
+        )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['title'] == 'one query'
+    assert response.json()['updated_at'] >= response.json()['created_at']
+
+
+async def test_delete_todo_should_issue_a_single_query(
+    session, client, user, token, assert_num_queries
+):
+    todo = TodoFactory(user_id=user.id)
+    session.add(todo)
+    await session.commit()
+    client.get('/todos/', headers={'Authorization': f'Bearer {token}'})
+
+    with assert_num_queries(1):
+        response = client.delete(
+            f'/todos/{todo.id}', headers={'Authorization': f'Bearer {token}'}
+        )
+
+    assert response.status_code == HTTPStatus.OK
+
+
+async def test_should_export_todos_as_ndjson(session, client, user, token):
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id))
+    await session.commit()
+
+    response = client.get(
+        '/todos/export', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    todos = [json.loads(line) for line in response.text.splitlines()]
+    assert [todo['id'] for todo in todos] == [1, 2, 3]
+    assert set(todos[0]) == set(TodoPublic.model_fields)
+
+
+async def test_should_export_todos_as_csv(
+    session, client, user, other_user, token
+):
+    todo = TodoFactory(user_id=user.id, title='a, "quoted" title')
+    session.add(todo)
+    session.add(TodoFactory(user_id=other_user.id))
+    await session.commit()
+
+    response = client.get(
+        '/todos/export?format=csv',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/csv')
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 1
+    assert rows[0]['title'] == 'a, "quoted" title'
+    assert rows[0]['state'] == todo.state.value
+
+
+async def test_list_todos_should_return_not_modified_for_matching_etag(
+    session, client, user, token
+):
+    session.add_all(TodoFactory.create_batch(2, user_id=user.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+    etag = client.get('/todos/', headers=headers).headers['ETag']
+
+    response = client.get(
+        '/todos/', headers={**headers, 'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['ETag'] == etag
+    assert not response.content
+
+    response = client.get(
+        '/todos/?limit=1', headers={**headers, 'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+
+    client.post(
+        '/todos/',
+        headers=headers,
+        json={'title': 'new', 'description': 'new', 'state': 'todo'},
+    )
+    response = client.get(
+        '/todos/', headers={**headers, 'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['ETag'] != etag
+    assert len(response.json()['todos']) == 3  # noqa: PLR2004
+
+
+@pytest.fixture()
+def settled_changes():
+    with patch.object(todos_routes.settings, 'TODO_CHANGES_SAFETY_LAG', 0):
+        yield
+
+
+async def test_list_todos_etag_should_change_on_out_of_order_commit(
+    session, client, user, token
+):
+    todos = TodoFactory.create_batch(2, user_id=user.id)
+    session.add_all(todos)
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+    etag = client.get('/todos/', headers=headers).headers['ETag']
+
+    # A transaction that started before the newest write commits last.
+    await session.execute(
+        update(Todo)
+        .where(Todo.id == todos[0].id)
+        .values(updated_at=datetime(2000, 1, 1))
+    )
+    await session.commit()
+
+    response = client.get(
+        '/todos/', headers={**headers, 'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+
+
+async def test_todo_changes_should_resend_changes_younger_than_horizon(
+    session, client, user, token
+):
+    todos = TodoFactory.create_batch(2, user_id=user.id)
+    session.add_all(todos)
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    first = client.get(
+        '/todos/changes', headers=headers, params={'limit': 1}
+    ).json()
+    second = client.get(
+        '/todos/changes',
+        headers=headers,
+        params={'since': first['next_cursor']},
+    ).json()
+
+    assert first['next_cursor'] is None
+    assert first['has_more'] is False
+    assert [todo['id'] for todo in second['todos']] == [
+        todo.id for todo in todos
+    ]
+
+
+@pytest.mark.usefixtures('settled_changes')
+async def test_should_list_todo_changes_since_cursor(
+    session, client, user, token
+):
+    todos = TodoFactory.create_batch(3, user_id=user.id)
+    session.add_all(todos)
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.get('/todos/changes', headers=headers)
+    changes = response.json()
+
+    assert response.status_code == HTTPStatus.OK
+    assert [todo['id'] for todo in changes['todos']] == [
+        todo.id for todo in todos
+    ]
+    assert changes['deleted'] == []
+    assert changes['has_more'] is False
+
+    client.patch(
+        f'/todos/{todos[0].id}', headers=headers, json={'title': 'changed'}
+    )
+    client.delete(f'/todos/{todos[1].id}', headers=headers)
+
+    response = client.get(
+        '/todos/changes',
+        headers=headers,
+        params={'since': changes['next_cursor']},
+    )
+    changes = response.json()
+
+    assert [todo['title'] for todo in changes['todos']] == ['changed']
+    assert changes['deleted'] == [todos[1].id]
+
+    response = client.get(
+        '/todos/changes',
+        headers=headers,
+        params={'since': changes['next_cursor']},
+    )
+
+    assert response.json() == {
+        'todos': [],
+        'deleted': [],
+        'next_cursor': changes['next_cursor'],
+        'has_more': False,
+    }
+
+
+@pytest.mark.usefixtures('settled_changes')
+async def test_todo_changes_should_page_with_limit(
+    session, client, user, token
+):
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    first = client.get(
+        '/todos/changes', headers=headers, params={'limit': 2}
+    ).json()
+    second = client.get(
+        '/todos/changes',
+        headers=headers,
+        params={'limit': 2, 'since': first['next_cursor']},
+    ).json()
+
+    assert len(first['todos']) == 2  # noqa: PLR2004
+    assert first['has_more'] is True
+    assert len(second['todos']) == 1
+    assert second['has_more'] is False
+
+
+def test_todo_changes_should_return_bad_request_for_invalid_cursor(
+    client, token
+):
+    response = client.get(
+        '/todos/changes',
+        headers={'Authorization': f'Bearer {token}'},
+        params={'since': 'invalid'},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
+
+
+def test_todo_changes_should_reject_cursor_older_than_retention(client, token):
+    response = client.get(
+        '/todos/changes',
+        headers={'Authorization': f'Bearer {token}'},
+        params={
+            'since': encode_cursor(
+                datetime(2000, 1, 1), todos_routes.CHANGE_DELETED, 1
+            )
+        },
+    )
+
+    assert response.status_code == HTTPStatus.GONE
+    assert response.json() == {
+        'detail': 'Cursor expired; list todos again to resync'
+    }
+
+
+async def test_delete_should_prune_expired_tombstones(
+    session, client, user, other_user, token
+):
+    todo = TodoFactory(user_id=user.id)
+    session.add_all([
+        todo,
+        TodoDeletion(todo_id=100, user_id=user.id),
+        TodoDeletion(todo_id=101, user_id=user.id),
+        TodoDeletion(todo_id=200, user_id=other_user.id),
+    ])
+    await session.commit()
+    retention = timedelta(
+        days=todos_routes.settings.TODO_CHANGES_RETENTION_DAYS
+    )
+    await session.execute(
+        update(TodoDeletion)
+        .where(TodoDeletion.todo_id.in_([100, 200]))
+        .values(deleted_at=func.now() - retention - timedelta(minutes=1))
+    )
+    await session.commit()
+
+    client.delete(
+        f'/todos/{todo.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert set(await session.scalars(select(TodoDeletion.todo_id))) == {
+        101,
+        200,
+        todo.id,
+    }
+
+
+async def test_should_count_todos_per_state(
+    session, client, user, other_user, token
+):
+    session.add_all([
+        *TodoFactory.create_batch(3, user_id=user.id, state=TodoState.todo),
+        TodoFactory(user_id=user.id, state=TodoState.done),
+        TodoFactory(user_id=other_user.id, state=TodoState.todo),
+    ])
+    await session.commit()
+
+    response = client.get(
+        '/todos/stats', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'total': 4,
+        'states': {'draft': 0, 'todo': 3, 'doing': 0, 'done': 1, 'trash': 0},
+    }
+
+
+def test_stats_should_follow_todo_writes(client, token, assert_num_queries):
+    headers = {'Authorization': f'Bearer {token}'}
+    ids = [
+        result['id']
+        for result in client.post(
+            '/todos/bulk',
+            headers=headers,
+            json=[
+                {'title': f'todo {i}', 'description': 'd', 'state': 'todo'}
+                for i in range(4)
+            ],
+        ).json()['results']
+    ]
+    client.patch(f'/todos/{ids[0]}', headers=headers, json={'state': 'done'})
+    client.patch(f'/todos/{ids[1]}', headers=headers, json={'title': 'kept'})
+    client.patch(
+        '/todos/bulk', headers=headers, json=[{'id': ids[2], 'state': 'doing'}]
+    )
+    client.delete(f'/todos/{ids[3]}', headers=headers)
+    client.request('DELETE', '/todos/bulk', headers=headers, json=[ids[0]])
+
+    with assert_num_queries(1):
+        response = client.get('/todos/stats', headers=headers)
+
+    assert response.json() == {
+        'total': 2,
+        'states': {'draft': 0, 'todo': 1, 'doing': 1, 'done': 0, 'trash': 0},
+    }
+
+
+@pytest.mark.parametrize(
+    'url', ['/todos/?limit=0', '/todos/?offset=-1', '/todos/changes?limit=0']
+)
+def test_should_reject_out_of_range_pagination(client, token, url):
+    response = client.get(url, headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
@@ -1,6 +1,14 @@
 from http import HTTPStatus
 
+import pytest
+
+from fast_zero import security
+from fast_zero.database import get_read_session
+from fast_zero.pagination import encode_cursor
+from fast_zero.routes import users as users_routes
 from fast_zero.schemas import UserPublic, UserSchema
+from fast_zero.security import decode_access_token
+from tests.factories import UserFactory
 
 
 def test_should_return_users_list(client, user):
@@ -8,7 +16,7 @@ def test_should_return_users_list(client, user):
     response = client.get('/users/')
 
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'users': [user_schema]}
+    assert response.json() == {'users': [user_schema], 'next_cursor': None}
 
 
 def test_should_save_new_user_with_id(client):
@@ -29,6 +37,20 @@ def test_should_save_new_user_with_id(client):
     }
 
 
+def test_should_save_user_with_a_single_insert(client, assert_num_queries):
+    with assert_num_queries(1):
+        response = client.post(
+            '/users/',
+            json={
+                'username': 'alice',
+                'email': 'alice@example.com',
+                'password': 'secret',
+            },
+        )
+
+    assert response.status_code == HTTPStatus.CREATED
+
+
 def test_should_raise_bad_request_same_username(client, user):
     user_schema = UserSchema.model_validate(user).model_dump()
     response = client.post('/users/', json=user_schema)
@@ -117,6 +139,34 @@ def test_should_return_not_found_while_get_user(client):
     assert response.json() == {'detail': 'User not found'}
 
 
+def test_get_user_should_return_not_modified_for_matching_etag(
+    client, user, token
+):
+    etag = client.get(f'/users/{user.id}').headers['ETag']
+
+    response = client.get(f'/users/{user.id}', headers={'If-None-Match': etag})
+
+    assert etag.startswith('W/')
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['ETag'] == etag
+    assert not response.content
+
+    client.put(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'username': 'bob',
+            'email': 'bob@example.com',
+            'password': 'mynewpassword',
+        },
+    )
+    response = client.get(f'/users/{user.id}', headers={'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['ETag'] != etag
+    assert response.json()['username'] == 'bob'
+
+
 def test_should_return_unauthorized_no_existing_user(client, invalid_token):
     response = client.put(
         '/users/1',
@@ -150,3 +200,198 @@ def test_should_return_unauthorized_malformed_token(client):
 
     assert response.status_code == HTTPStatus.UNAUTHORIZED
     assert response.json()['detail'] == 'Could not validate credentials'
+
+
+async def test_should_cache_authenticated_principal(session, client, token):
+    response = client.post(
+        '/auth/refresh_token', headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    user = await security.principal_cache.get(
+        decode_access_token(token)['sub']
+    )
+
+    assert user['id'] == 1
+
+
+async def test_should_update_cached_principal_and_invalidate_cache(
+    session, client, user, token
+):
+    client.post(
+        '/auth/refresh_token', headers={'Authorization': f'Bearer {token}'}
+    )
+    session.expunge_all()
+
+    response = client.put(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'username': 'cached',
+            'email': 'cached@transamerica.com',
+            'password': 'secret',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['username'] == 'cached'
+    assert await security.principal_cache.get(user.email) is None
+
+
+async def test_should_delete_cached_principal_and_invalidate_cache(
+    session, client, user, token
+):
+    client.post(
+        '/auth/refresh_token', headers={'Authorization': f'Bearer {token}'}
+    )
+    session.expunge_all()
+
+    response = client.delete(
+        f'/users/{user.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert await security.principal_cache.get(user.email) is None
+
+    response = client.post(
+        '/auth/refresh_token', headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+async def test_should_paginate_users_with_cursor(session, client):
+    session.add_all(UserFactory.create_batch(5))
+    await session.commit()
+
+    response = client.get('/users/?limit=2')
+    first_page = response.json()
+
+    response = client.get(
+        f'/users/?limit=2&cursor={first_page["next_cursor"]}'
+    )
+    second_page = response.json()
+
+    assert response.status_code == HTTPStatus.OK
+    assert [user['id'] for user in first_page['users']] == [1, 2]
+    assert [user['id'] for user in second_page['users']] == [3, 4]
+
+    response = client.get(
+        f'/users/?limit=2&cursor={second_page["next_cursor"]}'
+    )
+
+    assert [user['id'] for user in response.json()['users']] == [5]
+    assert response.json()['next_cursor'] is None
+
+
+@pytest.mark.parametrize(
+    'params', ['limit=0', 'limit=-1', 'limit=101', 'skip=-1']
+)
+def test_should_reject_out_of_range_pagination(client, user, params):
+    response = client.get(f'/users/?{params}')
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_should_return_bad_request_for_invalid_cursor(client):
+    response = client.get('/users/?cursor=invalid')
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
+
+
+def test_should_not_cache_user_pages_past_the_end(client, user):
+    for skip in range(3):
+        response = client.get(f'/users/?skip={skip}')
+
+    assert response.json() == {'users': [], 'next_cursor': None}
+    assert len(users_routes.user_page_cache.backend.local) == 1
+
+
+def test_should_share_cached_page_between_cursor_encodings(client, user):
+    cursor = encode_cursor(0)
+
+    client.get(f'/users/?cursor={cursor}')
+    client.get(f'/users/?cursor={cursor}==')
+
+    assert len(users_routes.user_page_cache.backend.local) == 1
+
+
+async def test_should_serve_cached_user_until_updated(
+    session, client, user, token, assert_num_queries
+):
+    client.get(f'/users/{user.id}')
+    client.get('/users/')
+
+    with assert_num_queries(0):
+        client.get(f'/users/{user.id}')
+        client.get('/users/')
+
+    client.put(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'username': 'bob',
+            'email': 'bob@example.com',
+            'password': 'mynewpassword',
+        },
+    )
+
+    assert client.get(f'/users/{user.id}').json()['username'] == 'bob'
+    assert client.get('/users/').json()['users'][0]['username'] == 'bob'
+
+
+def test_should_list_new_user_after_signup(client, user):
+    client.get('/users/')
+
+    client.post(
+        '/users/',
+        json={
+            'username': 'alice',
+            'email': 'alice@example.com',
+            'password': 'secret',
+        },
+    )
+
+    response = client.get('/users/')
+
+    assert [u['username'] for u in response.json()['users']] == [
+        user.username,
+        'alice',
+    ]
+
+
+async def test_cached_principal_should_not_store_password_hash(
+    client, user, token
+):
+    client.post(
+        '/auth/refresh_token', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert 'password' not in await security.principal_cache.get(user.email)
+
+
+async def test_should_not_cache_principal_loaded_during_invalidation(
+    session, user
+):
+    original_scalar = session.scalar
+
+    async def scalar_racing_a_delete(statement):
+        result = await original_scalar(statement)
+        await security.invalidate_principal(user.email)
+        return result
+
+    session.scalar = scalar_racing_a_delete
+    token = security.create_access_token({'sub': user.email})
+
+    assert await security.get_current_user(session, token) is user
+    assert await security.principal_cache.get(user.email) is None
+
+
+def test_user_cache_should_fill_from_primary(client, user):
+    def replica_session():
+        raise AssertionError
+
+    client.app.dependency_overrides[get_read_session] = replica_session
+
+    assert client.get(f'/users/{user.id}').status_code == HTTPStatus.OK
+    assert client.get('/users/').status_code == HTTPStatus.OK